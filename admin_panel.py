@@ -0,0 +1,24 @@
+import streamlit as st
+from instrumentation import ENABLED, SLOW_QUERY_MS
+
+
+def show_admin_panel(run, fm):
+    """Timing breakdown of the rerun that just finished plus the process-wide SQL statistics."""
+    with st.expander(f"⏱️ توقيت الصفحة: {run.page} ({run.total_ms:,.0f} ms)"):
+        st.table([{"الجزء": label, "ms": round(ms, 1)} for label, ms in run.breakdown()])
+        st.caption(f"{run.sql_count} استعلام SQL في هذا التحديث")
+        if not ENABLED:
+            st.info("فعّل FINANCE_SQL_PROFILE=1 لتسجيل توقيت كل استعلام.")
+            return
+        stats = fm.query_stats()
+        st.caption(f"Query cache: {stats['cache_hits']} hits / {stats['cache_misses']} misses")
+        st.markdown("**أبطأ الاستعلامات إجمالاً**")
+        st.dataframe([
+            {"sql": s["sql"], "count": s["count"], "total ms": round(s["total_ms"], 1),
+             "max ms": round(s["max_ms"], 1), "rows": s["rows"]}
+            for s in stats["top"]
+        ], use_container_width=True)
+        st.markdown(f"**استعلامات أبطأ من {SLOW_QUERY_MS:g} ms**")
+        for entry in reversed(stats["slow"]):
+            st.code(f"-- {entry['ms']} ms, {entry['rows']} rows, params {entry['params']}\n{entry['sql']}\n"
+                    + "\n".join(f"-- {step}" for step in entry["plan"]), language="sql")
@@ -1,89 +1,60 @@
 import streamlit as st
-from finance_manager import FinanceManager
+from finance_manager import FinanceManager, get_pool
+from instrumentation import ADMINS, start_run
 from mobile_styles import apply_mobile_styles  # Import mobile styles
+from navigation import show_navigation
+from session_cookie import read_session_cookie, write_session_cookie
 from styles import apply_sidebar_styles, apply_topbar_styles  # Import other 
-# Set page configuration
-st.set_page_config(page_title="FloosAfandy - إحسبها يا عشوائي !!", layout="wide")
+# Set page configuration once for every page
+st.set_page_config(page_title="FloosAfandy - إحسبها يا عشوائي !!", layout="wide", initial_sidebar_state="collapsed")
 
 # Apply styles
 apply_mobile_styles()
 apply_sidebar_styles()
 apply_topbar_styles()
 
+# Open the shared connection pool and bootstrap the schema once per process
+get_pool()
+
 # Initialize session state
 if "user_id" not in st.session_state:
     st.session_state.user_id = None
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
-if "current_page" not in st.session_state:
-    st.session_state.current_page = "home"
-
-# Show navigation components
-st.sidebar.title("التنقل")
-if st.sidebar.button("🏠 الرئيسية"):
-    st.session_state.current_page = "home"
-if st.sidebar.button("💳 المعاملات"):
-    st.session_state.current_page = "transactions"
-if st.sidebar.button("🏦 الحسابات"):
-    st.session_state.current_page = "accounts"
-if st.sidebar.button("📈 التقارير"):
-    st.session_state.current_page = "reports"
-if st.sidebar.button("📚 التعليمات"):
-    st.session_state.current_page = "instructions"
-
-# Handle page navigation
-if st.session_state.current_page == "home":
-    if st.session_state.logged_in:
-        st.success("مرحبًا بك في FloosAfandy!")
-        st.write("يمكنك الآن إدارة حساباتك ومعاملاتك.")
-    else:
-        st.title("مرحبًا بك في FloosAfandy")
-        st.markdown(
-            f'<div style="display: flex; justify-content: center; margin: 20px 0;">'
-            f'<img src="https://i.ibb.co/KpzDy27r/IMG-2998.png" width="300">'
-            f'</div>',
-            unsafe_allow_html=True
-        )
-        tab1, tab2 = st.tabs(["🔑 تسجيل الدخول", "🆕 إنشاء حساب جديد"])
-
-        fm = FinanceManager()
-
-        with tab1:  # Login
-            st.subheader("تسجيل الدخول إلى حسابك")
-            login_username = st.text_input("اسم المستخدم", key="login_username")
-            login_password = st.text_input("كلمة المرور", type="password", key="login_password")
-            if st.button("تسجيل الدخول"):
-                if fm.verify_user(login_username, login_password):
-                    st.session_state.user_id = login_username
-                    st.session_state.logged_in = True
-                    st.success(f"مرحبًا بك، {login_username}!")
-                    st.session_state.current_page = "transactions"  # Redirect to transactions page
-                    st.experimental_rerun()
-                else:
-                    st.error("اسم المستخدم أو كلمة المرور غير صحيحة!")
-
-        with tab2:  # Register
-            st.subheader("إنشاء حساب جديد")
-            new_username = st.text_input("اسم المستخدم", key="new_username")
-            new_password = st.text_input("كلمة المرور", type="password", key="new_password")
-            confirm_password = st.text_input("تأكيد كلمة المرور", type="password", key="confirm_password")
-            if st.button("إنشاء الحساب"):
-                if new_password == confirm_password:
-                    if fm.add_user(new_username, new_password):
-                        st.success(f"تم إنشاء الحساب بنجاح! يمكنك الآن تسجيل الدخول باستخدام {new_username}.")
-                    else:
-                        st.error("اسم المستخدم موجود بالفعل!")
-                else:
-                    st.error("كلمات المرور غير متطابقة!")
-
-elif st.session_state.current_page == "transactions":
-    st.experimental_switch_page("pages/transactions.py")
-
-elif st.session_state.current_page == "accounts":
-    st.experimental_switch_page("pages/accounts.py")
-
-elif st.session_state.current_page == "reports":
-    st.experimental_switch_page("pages/reports.py")
 
-elif st.session_state.current_page == "instructions":
-    st.experimental_switch_page("pages/instructions.py")
+# Once per browser session, restore the login from the signed cookie so reloads and new tabs skip bcrypt
+if "session_checked" not in st.session_state:
+    st.session_state.session_checked = True
+    token = read_session_cookie()
+    user_id = token and FinanceManager().user_from_session_token(token)
+    if user_id:
+        st.session_state.user_id = user_id
+        st.session_state.logged_in = True
+
+# Pages; the private ones are only registered after login, which is the auth guard
+home = st.Page("pages/home.py", title="الرئيسية", icon="🏠", default=True)
+instructions = st.Page("pages/instructions.py", title="التعليمات", icon="📚")
+if st.session_state.logged_in:
+    pages = [
+        home,
+        st.Page("pages/dashboard.py", title="لوحة التحكم", icon="📊"),
+        st.Page("pages/transactions.py", title="المعاملات", icon="💳"),
+        st.Page("pages/accounts.py", title="الحسابات", icon="🏦"),
+        st.Page("pages/budgets.py", title="الميزانيات", icon="💰"),
+        st.Page("pages/reports.py", title="التقارير", icon="📈"),
+        instructions,
+    ]
+else:
+    pages = [home, instructions]
+
+current_page = st.navigation(pages, position="hidden")
+run = start_run(current_page.title)
+if "pending_cookie" in st.session_state:  # set by login / logout on the previous run
+    write_session_cookie(*st.session_state.pop("pending_cookie"))
+show_navigation(pages)
+current_page.run()
+
+# Per-rerun timing breakdown for the users listed in FINANCE_ADMINS
+if st.session_state.logged_in and st.session_state.user_id in ADMINS:
+    from admin_panel import show_admin_panel
+    show_admin_panel(run, FinanceManager(st.session_state.user_id))
@@ -0,0 +1,102 @@
+"""Bounded password hashing, and signed session tokens.
+
+bcrypt is CPU-bound (~250 ms at cost 12) and releases the GIL, so hashes
+and checks run on a small dedicated thread pool. The calling script
+thread still waits for the result: the pool bounds how much hashing runs
+at once, it does not make login non-blocking. At most
+FINANCE_HASH_WORKERS run at once and at most FINANCE_HASH_QUEUE callers
+wait for a slot; beyond that hash_password and check_password raise
+HashBusy at once instead of queueing, so the page can ask to retry. The
+work factor is FINANCE_BCRYPT_ROUNDS; hashes with a lower cost are
+upgraded the next time their owner logs in.
+
+A successful login issues an HMAC-signed token (username, expiry and a
+fragment of the stored hash, so changing the password revokes it). The
+app keeps it in a cookie and reloads or new tabs restore the session by
+checking the signature instead of running bcrypt again.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.environ.get('FINANCE_BCRYPT_ROUNDS', '12'))
+HASH_WORKERS = int(os.environ.get('FINANCE_HASH_WORKERS', '2'))
+HASH_QUEUE = int(os.environ.get('FINANCE_HASH_QUEUE', '32'))
+SESSION_DAYS = float(os.environ.get('FINANCE_SESSION_DAYS', '7'))
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='bcrypt')
+_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE)
+
+
+class HashBusy(RuntimeError):
+    """Every hashing slot is taken; try again shortly."""
+
+
+def _offload(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashBusy('password hashing is busy, try again')
+    try:
+        return _executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def _as_bytes(value):
+    return value.encode('utf-8') if isinstance(value, str) else value
+
+
+def hash_password(password, rounds=None):
+    return _offload(lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds or BCRYPT_ROUNDS)))
+
+
+def check_password(password, hashed):
+    return _offload(bcrypt.checkpw, password.encode('utf-8'), _as_bytes(hashed))
+
+
+def needs_rehash(hashed):
+    """True when ``hashed`` ($2b$<cost>$...) was made with a lower work factor than configured."""
+    try:
+        return int(_as_bytes(hashed).split(b'$')[2]) < BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _signature(secret, username, expires, hashed):
+    message = f'{username}|{expires}|'.encode('utf-8') + _as_bytes(hashed)[-16:]
+    return _b64(hmac.new(secret.encode('utf-8'), message, hashlib.sha256).digest())
+
+
+def issue_token(secret, username, hashed, days=SESSION_DAYS):
+    expires = int(time.time() + days * 86400)
+    return f"{_b64(username.encode('utf-8'))}.{expires}.{_signature(secret, username, expires, hashed)}"
+
+
+def token_username(token):
+    """Username a token claims to be for, before its signature is checked; None if malformed."""
+    try:
+        return _unb64(token.split('.')[0]).decode('utf-8')
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def check_token(secret, token, hashed):
+    try:
+        encoded, expires, signature = token.split('.')
+        username, expires = _unb64(encoded).decode('utf-8'), int(expires)
+    except (ValueError, UnicodeDecodeError):
+        return False
+    return expires > time.time() and hmac.compare_digest(signature, _signature(secret, username, expires, hashed))
@@ -0,0 +1,155 @@
+"""Deterministic synthetic data for finance.db.
+
+Creates users, accounts, custom categories and transactions from a seeded
+RNG, so the same arguments always produce the same database. Rows are
+loaded with the per-row triggers dropped (migrations.bulk_load) and the
+derived tables, balances and checkpoints are rebuilt once at the end,
+which keeps 10M-row datasets practical.
+
+Usage: python benchmarks/generate_data.py --db bench.db --users 100 --transactions 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from migrations import bulk_load, migrate  # noqa: E402
+
+CATEGORIES = {
+    "IN": ["راتب", "مكافأة", "عمل حر", "إيجار محصل", "أرباح", "هدية"],
+    "OUT": ["طعام", "مواصلات", "إيجار", "فواتير", "ترفيه", "صحة", "تعليم", "ملابس", "سفر", "تسوق", "اشتراكات", "صدقة"],
+}
+PAYMENT_METHODS = ["كاش", "بطاقة ائتمان", "تحويل بنكي"]
+WORDS = ["سوبر ماركت", "مطعم", "بنزين", "كهرباء", "مياه", "إنترنت", "صيدلية", "Uber", "Amazon", "Netflix",
+         "كافيه", "مدرسة", "جيم", "Carrefour", "فودافون", "راتب شهر", "تحويل", "هدية عيد", "كتب", "صيانة"]
+BATCH_SIZE = 50_000
+# Any bcrypt hash works here; benchmark users never log in.
+PASSWORD_HASH = b"$2b$12$C6UzMDM.H6dfI/f/IKcEeO5bQpGSa.z7T6Rv6aV0gJ4bq4F0FZsyq"
+
+
+def user_name(n):
+    return f"user{n:05d}"
+
+
+def _user_shares(args):
+    """Transactions per user; user00000 is the 'heavy' user holding --heavy-share of all rows."""
+    if args.users == 1:
+        return [args.transactions]
+    heavy = int(args.transactions * args.heavy_share)
+    rest = args.transactions - heavy
+    shares = [heavy] + [rest // (args.users - 1)] * (args.users - 1)
+    shares[-1] += args.transactions - sum(shares)
+    return shares
+
+
+def _transactions(rng, user, account_ids, count, start, days):
+    for _ in range(count):
+        trans_type = "IN" if rng.random() < 0.3 else "OUT"
+        amount = round(rng.lognormvariate(5.5 if trans_type == "IN" else 4.5, 1.0) * 100)  # piasters
+        moment = start + timedelta(seconds=rng.randrange(days * 86400))
+        yield (user, moment.strftime("%Y-%m-%d %H:%M:%S"), trans_type, amount, rng.choice(account_ids),
+               f"{rng.choice(WORDS)} {rng.randrange(1000)}", rng.choice(PAYMENT_METHODS),
+               rng.choice(CATEGORIES[trans_type]))
+
+
+def generate(conn, args):
+    rng = random.Random(args.seed)
+    start = datetime.fromisoformat(args.start)
+    created = start.strftime("%Y-%m-%d %H:%M:%S")
+    migrate(conn)
+
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)",
+                         [(user_name(n), PASSWORD_HASH) for n in range(args.users)])
+    accounts = {}
+    with conn:
+        for n in range(args.users):
+            user = user_name(n)
+            accounts[user] = []
+            for a in range(args.accounts):
+                opening = round(rng.uniform(0, 50_000) * 100)
+                cursor = conn.execute('''
+                    INSERT INTO accounts (user_id, name, balance, min_balance, created_at, opening_balance)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (user, f"حساب {a + 1}", opening, round(rng.uniform(0, 2_000) * 100), created, opening))
+                accounts[user].append(cursor.lastrowid)
+                conn.executemany("INSERT OR IGNORE INTO custom_categories (user_id, account_id, type, name) VALUES (?, ?, ?, ?)",
+                                 [(user, cursor.lastrowid, t, name) for t, names in CATEGORIES.items()
+                                  for name in names[:args.categories]])
+
+    loaded = 0
+    with bulk_load(conn):
+        for n, count in enumerate(_user_shares(args)):
+            user = user_name(n)
+            rows = _transactions(rng, user, accounts[user], count, start, args.days)
+            while True:
+                batch = [row for _, row in zip(range(BATCH_SIZE), rows)]
+                if not batch:
+                    break
+                with conn:
+                    conn.executemany('''
+                        INSERT INTO transactions (user_id, date, type, amount, account_id, description, payment_method, category)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', batch)
+                loaded += len(batch)
+                if not args.quiet:
+                    print(f"\r{loaded:,}/{args.transactions:,} transactions", end="", file=sys.stderr)
+        if not args.quiet:
+            print("\nrebuilding rollups and search index...", file=sys.stderr)
+
+    with conn:
+        conn.execute('''
+            UPDATE accounts SET balance = opening_balance + COALESCE((
+                SELECT SUM(CASE WHEN t.type = 'IN' THEN t.amount ELSE -t.amount END)
+                FROM transactions t WHERE t.user_id = accounts.user_id AND t.account_id = accounts.id
+            ), 0), entries_since_checkpoint = 0
+        ''')
+        conn.execute('''
+            INSERT OR REPLACE INTO balance_checkpoints (account_id, as_of_date, as_of_id, balance)
+            SELECT a.id, t.date, t.id, a.balance
+            FROM accounts a JOIN transactions t ON t.id = (
+                SELECT id FROM transactions WHERE user_id = a.user_id AND account_id = a.id ORDER BY date DESC, id DESC LIMIT 1
+            )
+        ''')
+        conn.execute('''
+            INSERT INTO data_versions (user_id, version) SELECT username, 1 FROM users WHERE true
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1
+        ''')
+    conn.execute("ANALYZE")
+    return loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=os.environ.get("FINANCE_DB", "finance.db"), help="database file to fill")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--accounts", type=int, default=3, help="accounts per user")
+    parser.add_argument("--categories", type=int, default=6, help="custom categories per account and type")
+    parser.add_argument("--transactions", type=int, default=100_000, help="total transactions across all users")
+    parser.add_argument("--heavy-share", type=float, default=0.2, help="share of all transactions owned by user00000")
+    parser.add_argument("--start", default="2015-01-01", help="first transaction date")
+    parser.add_argument("--days", type=int, default=3650, help="length of the transaction history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        loaded = generate(conn, args)
+    finally:
+        conn.close()
+    if not args.quiet:
+        print(f"{loaded:,} transactions for {args.users} users in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
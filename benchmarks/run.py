@@ -0,0 +1,183 @@
+"""Benchmark suite for FinanceManager methods and the pages' data-prep steps.
+
+For each dataset size a database is generated once (and cached under
+--data-dir), then every case is timed against the heavy user in a fresh
+worker process. Query-cache entries are cleared before every timed call,
+so the numbers are database cost, not cache hits. Results are written as
+JSON; --compare prints the ratio against an earlier results file.
+
+Usage: python benchmarks/run.py --sizes 10000,100000,1000000 --output results.json [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+USER = "user00000"
+
+
+def _dashboard_prep(fm):
+    import pandas as pd
+    from chart_data import time_series
+
+    fm.get_all_accounts()
+    fm.get_summary()
+    fm.get_alerts()
+    pd.DataFrame(time_series(fm), columns=["date", "type", "amount"])
+    pd.DataFrame(fm.get_category_totals(), columns=["category", "amount"])
+    fm.get_transactions_page(limit=5, as_frame=True)
+
+
+def _reports_prep(fm):
+    start, end = date(2020, 1, 1), date(2020, 12, 31)
+    fm.filter_transactions(start_date=start, end_date=end, as_frame=True)
+    fm.get_summary(start=start, end=end)
+    fm.get_month_summary("2020-11")
+    fm.get_category_breakdown(start_date=start, end_date=end, limit=5)
+
+
+def _transactions_prep(fm):
+    fm.get_summary()
+    fm.get_transactions_page(limit=50, as_frame=True)
+
+
+def _deep_page(fm):
+    cursor = None
+    for _ in range(20):
+        _, cursor = fm.get_transactions_page(cursor, limit=50)
+
+
+def _cases(fm, account_id, added):
+    return {
+        "get_all_accounts": lambda: fm.get_all_accounts(),
+        "get_all_transactions": lambda: fm.get_all_transactions(),
+        "filter_transactions_year": lambda: fm.filter_transactions(start_date="2020-01-01", end_date="2020-12-31 23:59:59"),
+        "get_summary": lambda: fm.get_summary(),
+        "get_summary_account_year": lambda: fm.get_summary(account_id, "2020-01-01", "2020-12-31 23:59:59"),
+        "get_month_summary": lambda: fm.get_month_summary("2020-11"),
+        "get_category_totals": lambda: fm.get_category_totals(),
+        "filter_transactions_category": lambda: fm.filter_transactions(category="طعام"),
+        "get_category_breakdown_year": lambda: fm.get_category_breakdown(start_date=date(2020, 1, 1), end_date=date(2020, 12, 31)),
+        "get_monthly_totals": lambda: fm.get_monthly_totals(),
+        "get_time_series_week": lambda: fm.get_time_series("week"),
+        "get_transactions_page_first": lambda: fm.get_transactions_page(limit=50),
+        "get_transactions_page_20th": lambda: _deep_page(fm),
+        "search_transactions": lambda: fm.search_transactions("سوبر", limit=50),
+        "get_balance_at": lambda: fm.get_balance_at(account_id, date(2020, 6, 30)),
+        "verify_balances": lambda: fm.verify_balances(),
+        "get_alerts": lambda: fm.get_alerts(),
+        "get_budgets": lambda: fm.get_budgets(date(2020, 6, 30)),
+        "add_transaction": lambda: added.append(fm.add_transaction(account_id, 100, "OUT", "benchmark", "كاش", "طعام")),
+        "page_dashboard_prep": lambda: _dashboard_prep(fm),
+        "page_reports_prep": lambda: _reports_prep(fm),
+        "page_transactions_prep": lambda: _transactions_prep(fm),
+    }
+
+
+def worker(size, repeat, only):
+    """Runs inside a process whose FINANCE_DB points at the generated database."""
+    sys.path.insert(0, ROOT)
+    from finance_manager import FinanceManager
+
+    fm = FinanceManager(USER)
+    account_id = fm.get_all_accounts()[0][0]
+    results = []
+    added = []
+    for name, case in _cases(fm, account_id, added).items():
+        if only and name not in only:
+            continue
+        timings = []
+        try:
+            for _ in range(repeat):
+                fm.pool.cache.clear()
+                fm.pool.frames.clear()
+                started = time.perf_counter()
+                case()
+                timings.append((time.perf_counter() - started) * 1000)
+        except ImportError as e:
+            results.append({"size": size, "case": name, "skipped": str(e)})
+            continue
+        results.append({
+            "size": size, "case": name, "repeat": repeat,
+            "median_ms": round(statistics.median(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3),
+        })
+    # Keep the cached dataset identical across runs.
+    for trans_id in added:
+        fm.delete_transaction(trans_id)
+    print(json.dumps(results))
+
+
+def _dataset(size, data_dir, seed):
+    path = os.path.join(data_dir, f"bench-{size}-{seed}.db")
+    if not os.path.exists(path):
+        subprocess.run([sys.executable, os.path.join(HERE, "generate_data.py"), "--db", path, "--seed", str(seed),
+                        "--transactions", str(size), "--users", str(max(2, min(1000, size // 1000))), "--quiet"],
+                       check=True)
+    return path
+
+
+def compare(results, baseline):
+    old = {(r["size"], r["case"]): r for r in baseline["results"] if "median_ms" in r}
+    print(f"{'size':>10}  {'case':<28} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for r in results["results"]:
+        before = old.get((r["size"], r["case"]))
+        if before and "median_ms" in r:
+            ratio = r["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+            print(f"{r['size']:>10}  {r['case']:<28} {before['median_ms']:>10.2f} {r['median_ms']:>10.2f} {ratio:>6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated total transaction counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cases", help="comma-separated subset of case names")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "floosafandy-bench"))
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    only = set(args.cases.split(",")) if args.cases else None
+
+    if args.worker is not None:
+        worker(args.worker, args.repeat, only)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        env = dict(os.environ, FINANCE_DB=_dataset(size, args.data_dir, args.seed))
+        command = [sys.executable, os.path.abspath(__file__), "--worker", str(size), "--repeat", str(args.repeat)]
+        if args.cases:
+            command += ["--cases", args.cases]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        results.extend(json.loads(output.strip().splitlines()[-1]))
+
+    payload = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "seed": args.seed,
+                 "repeat": args.repeat, "user": USER},
+        "results": results,
+    }
+    text = json.dumps(payload, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(payload, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cold-start benchmark: per-page import cost and time to first render.
+
+Every measurement runs in a fresh interpreter, so nothing is already in
+sys.modules. Results are written as JSON; with --check the run fails when
+a page exceeds its budget in startup_budget.json.
+
+Usage: python benchmarks/startup.py [--repeat N] [--output FILE] [--check]
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+PAGES = ["pages/home.py", "pages/dashboard.py", "pages/transactions.py", "pages/accounts.py",
+         "pages/budgets.py", "pages/reports.py", "pages/instructions.py"]
+
+# The shell's own imports (app.py) are preloaded untimed; what is timed is what the page adds on top.
+IMPORT_PROBE = """
+{preload}
+import time
+start = time.perf_counter()
+{imports}
+print(time.perf_counter() - start)
+"""
+
+RENDER_PROBE = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+at.session_state.user_id = "benchmark"
+at.session_state.logged_in = {logged_in}
+at.switch_page({page!r})
+at.run()
+assert not at.exception, at.exception
+print(time.perf_counter() - start)
+"""
+
+
+def _top_level_imports(path):
+    """The page's module-level import statements, which is what a cold first render has to pay for."""
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def _probe(code, env):
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "probe failed")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def measure(repeat):
+    env = dict(os.environ, FINANCE_DB=os.path.join(tempfile.mkdtemp(), "startup.db"), PYTHONPATH=ROOT)
+    results = {}
+    for page in PAGES:
+        code = IMPORT_PROBE.format(preload=_top_level_imports("app.py"), imports=_top_level_imports(page))
+        imports = [_probe(code, env) for _ in range(repeat)]
+        renders = [_probe(RENDER_PROBE.format(page=page, logged_in=page != "pages/home.py"), env) for _ in range(repeat)]
+        results[page] = {
+            "import_ms": round(statistics.median(imports) * 1000, 1),
+            "first_render_ms": round(statistics.median(renders) * 1000, 1),
+        }
+    return results
+
+
+def check(results, budget):
+    failures = []
+    for page, limits in budget.items():
+        for metric, limit in limits.items():
+            value = results.get(page, {}).get(metric)
+            if value is not None and value > limit:
+                failures.append(f"{page}: {metric} {value} ms > budget {limit} ms")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="cold runs per page; the median is reported")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any page is over its budget")
+    args = parser.parse_args(argv)
+
+    results = {"python": sys.version.split()[0], "pages": measure(args.repeat)}
+    payload = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+    if args.check:
+        with open(BUDGET_FILE, encoding="utf-8") as f:
+            failures = check(results["pages"], json.load(f))
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Chart-ready series: SQL time bucketing plus LTTB downsampling to a fixed point budget."""
+from datetime import date
+
+from money import MINOR_PER_MAJOR
+
+MAX_POINTS = 400
+TYPE_LABELS = {"IN": "وارد", "OUT": "منصرف"}
+
+
+def choose_bucket(start, end, max_points=MAX_POINTS):
+    """Finest of day/week/month that keeps one series of the range within ``max_points``."""
+    if not start or not end:
+        return "day"
+    days = (date.fromisoformat(str(end)[:10]) - date.fromisoformat(str(start)[:10])).days + 1
+    if days <= max_points:
+        return "day"
+    if days / 7 <= max_points:
+        return "week"
+    return "month"
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets: keep ``threshold`` of the (x, y) points that best preserve the shape."""
+    if threshold >= len(points) or threshold < 3:
+        return points
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        next_bucket = points[end:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+        ax, ay = points[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def time_series(fm, max_points=MAX_POINTS, **filters):
+    """[(date, type label, pounds)] bucketed in SQL and downsampled per type to at most ``max_points`` each."""
+    start, end = filters.get("start_date"), filters.get("end_date")
+    if not (start and end):
+        first, last = fm.get_date_range(**filters)
+        start, end = start or first, end or last
+    if not start:
+        return []
+    series = {}
+    for bucket, trans_type, total, _ in fm.get_time_series(choose_bucket(start, end, max_points), **filters):
+        series.setdefault(trans_type, []).append((date.fromisoformat(bucket).toordinal(), total))
+    return [
+        (date.fromordinal(x), TYPE_LABELS.get(trans_type, trans_type), y / MINOR_PER_MAJOR)
+        for trans_type, points in series.items()
+        for x, y in lttb(points, max_points)
+    ]
@@ -0,0 +1,53 @@
+"""Columnar fetch from SQLite cursors.
+
+sqlite3 hands rows over as tuples, but nothing after that needs to go row by
+row: rows are pulled ``batch_size`` at a time, transposed, and every column
+is converted in one call into an Arrow array (pyarrow ships with streamlit)
+or, without pyarrow, a typed NumPy array. pandas then receives finished
+columns instead of inferring dtypes from an object matrix, and peak memory
+holds one batch of tuples rather than the whole result.
+"""
+import importlib.util
+from itertools import islice
+
+BATCH_SIZE = 10000
+HAVE_ARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+def _batches(rows, batch_size):
+    fetchmany = getattr(rows, 'fetchmany', None)
+    if fetchmany is None:
+        rows = iter(rows)
+        fetchmany = lambda size: list(islice(rows, size))  # noqa: E731
+    while True:
+        batch = fetchmany(batch_size)
+        if not batch:
+            return
+        yield batch
+
+
+def record_batches(rows, schema, batch_size=BATCH_SIZE):
+    """Arrow RecordBatches of ``schema`` from a cursor (or any iterable of row tuples)."""
+    import pyarrow as pa
+
+    for batch in _batches(rows, batch_size):
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(zip(*batch), schema)], schema=schema)
+
+
+def arrow_table(rows, schema, batch_size=BATCH_SIZE):
+    import pyarrow as pa
+
+    return pa.Table.from_batches(list(record_batches(rows, schema, batch_size)), schema=schema)
+
+
+def numpy_columns(rows, dtypes, batch_size=BATCH_SIZE):
+    """{name: ndarray} in the order of ``dtypes``, a dict of column name to NumPy dtype ('object' keeps
+    the Python values, for text and nullable columns)."""
+    import numpy as np
+
+    chunks = {name: [] for name in dtypes}
+    for batch in _batches(rows, batch_size):
+        for (name, dtype), column in zip(dtypes.items(), zip(*batch)):
+            chunks[name].append(np.fromiter(column, dtype=dtype, count=len(column)))
+    return {name: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[name]) for name, parts in chunks.items()}
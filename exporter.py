@@ -0,0 +1,96 @@
+"""Streaming export of transactions to CSV or Parquet.
+
+Rows are pulled from a SQLite cursor in batches and written out as they
+arrive, so peak memory is one batch regardless of how many rows match.
+Amounts are written in pounds, exactly (a decimal column in Parquet).
+"""
+import csv
+import os
+import tempfile
+import time
+
+from money import to_major
+
+BATCH_SIZE = 5000
+COLUMNS = ["id", "date", "type", "amount", "account_id", "account", "description", "payment_method", "category"]
+TYPE_LABELS = {"IN": "وارد", "OUT": "منصرف"}
+FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "floosafandy-exports")
+# Files of sessions that never came back for them are removed by the next export after this many seconds.
+EXPORT_MAX_AGE = 24 * 3600
+
+
+def _export_rows(batch, account_names):
+    # Transaction tuples are (id, user_id, date, type, amount, account_id, description, payment_method, category).
+    for row in batch:
+        yield (row[0], row[2], TYPE_LABELS.get(row[3], row[3]), to_major(row[4]), row[5],
+               account_names.get(row[5]), row[6], row[7], row[8])
+
+
+def write_csv(fm, path, account_names=None, batch_size=BATCH_SIZE, **filters):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for batch in fm.iter_transactions(batch_size, **filters):
+            writer.writerows(_export_rows(batch, account_names or {}))
+            count += len(batch)
+    return count
+
+
+def write_parquet(fm, path, account_names=None, batch_size=BATCH_SIZE, **filters):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()), ("date", pa.string()), ("type", pa.string()), ("amount", pa.decimal128(18, 2)),
+        ("account_id", pa.int64()), ("account", pa.string()), ("description", pa.string()),
+        ("payment_method", pa.string()), ("category", pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for batch in fm.iter_transactions(batch_size, **filters):
+            columns = list(zip(*_export_rows(batch, account_names or {})))
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema))
+            count += len(batch)
+    return count
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet}
+
+
+def sweep_exports(max_age=EXPORT_MAX_AGE):
+    """Delete export files last written more than ``max_age`` seconds ago; returns how many were removed."""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(EXPORT_DIR))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # Removed by a concurrent sweep or its session
+    return removed
+
+
+def export_to_tempfile(fm, fmt, account_names=None, previous=None, **filters):
+    """Write the export to a fresh temp file and return (path, row count); ``previous`` is removed first."""
+    if previous and os.path.exists(previous):
+        os.remove(previous)
+    sweep_exports()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=FORMATS[fmt][1], dir=EXPORT_DIR)
+    os.close(fd)
+    try:
+        return path, WRITERS[fmt](fm, path, account_names, **filters)
+    except Exception:
+        os.remove(path)
+        raise
@@ -1,76 +1,972 @@
+import calendar
+import hashlib
+import os
+import queue
 import sqlite3
-from datetime import datetime
-import bcrypt
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date as date_type, datetime, timedelta
+import auth
+from instrumentation import connection_factory, query_log, span
+from migrations import migrate
+from money import format_money
+from columnar import HAVE_ARROW, arrow_table, numpy_columns
+from frame_cache import CATEGORICAL_COLUMNS, FrameCache, append_frames
+from group_commit import GroupCommitWriter
+from query_cache import DataVersions, QueryCache
+from text_search import match_expression
+
+DB_PATH = os.environ.get('FINANCE_DB', 'finance.db')
+POOL_SIZE = int(os.environ.get('FINANCE_DB_POOL_SIZE', '8'))
+# Optional sharding: with FINANCE_SHARD_DIR set, each user's data lives in its own database file there (or,
+# with FINANCE_SHARD_BUCKETS > 0, in one of that many hash-bucket files), so writers of different tenants
+# do not queue on one lock. DB_PATH then only serves users and app_settings. At most MAX_OPEN_SHARDS shard
+# pools (SHARD_POOL_SIZE connections plus a version watcher each) stay open, least recently used closed first.
+SHARD_DIR = os.environ.get('FINANCE_SHARD_DIR')
+SHARD_BUCKETS = int(os.environ.get('FINANCE_SHARD_BUCKETS', '0'))
+MAX_OPEN_SHARDS = int(os.environ.get('FINANCE_MAX_OPEN_SHARDS', '64'))
+SHARD_POOL_SIZE = int(os.environ.get('FINANCE_SHARD_POOL_SIZE', '2'))
+# Optional group commit (see group_commit): each pool's writes share commits on one writer connection,
+# waiting at most GROUP_COMMIT_MS for others to join.
+GROUP_COMMIT = os.environ.get('FINANCE_GROUP_COMMIT') == '1'
+GROUP_COMMIT_MS = float(os.environ.get('FINANCE_GROUP_COMMIT_MS', '5'))
+GROUP_COMMIT_BATCH = int(os.environ.get('FINANCE_GROUP_COMMIT_BATCH', '256'))
+CHECKPOINT_INTERVAL = 256
+END_OF_TIME = ('9999-12-31 23:59:59', 2 ** 63 - 1)
+IMPORT_BATCH_SIZE = 1000
+BUCKET_SQL = {
+    'day': 'substr(date, 1, 10)',
+    'week': "date(date, '-6 days', 'weekday 1')",
+    'month': "printf('%04d-%02d-01', month_key / 100, month_key % 100)",
+}
+# Every amount FinanceManager takes or returns is an int in piasters (see money.py).
+# Column order of the transaction tuples every read method returns (and the pages index into).
+TRANSACTION_COLUMNS = 'id, user_id, date, type, amount, account_id, description, payment_method, category'
+# The as_frame=True variants: typed ts instead of the date text, no user_id.
+FRAME_COLUMNS = 'id, ts, type, amount, account_id, description, payment_method, category'
+FRAME_NAMES = ['id', 'date', 'type', 'amount', 'account_id', 'description', 'payment_method', 'category']
+# pandas dtypes of the frame columns besides date (datetime64 from the int ts); account_id is nullable.
+FRAME_DTYPES = {
+    'id': 'int64', 'type': 'category', 'amount': 'int64', 'account_id': 'Int64',
+    'description': 'object', 'payment_method': 'category', 'category': 'category',
+}
+
+# Spent vs allocated for each of :user's budgets in the month / week (starting Monday) given by the other
+# parameters. Monthly budgets read category_rollups and weekly ones the week's rows, so the cost does not
+# depend on the length of the history. A transaction tagged "a, b" counts towards both categories.
+BUDGET_SPEND_SQL = '''
+    WITH spend (period, account_id, category, total) AS (
+        SELECT 'month', r.account_id, c.name, r.total
+        FROM category_rollups r JOIN categories c ON c.id = r.category_id
+        WHERE r.user_id = :user AND r.month = :month AND r.type = 'OUT'
+        UNION ALL
+        SELECT 'week', t.account_id, c.name, t.amount
+        FROM transactions t
+        JOIN transaction_categories tc ON tc.transaction_id = t.id
+        JOIN categories c ON c.id = tc.category_id
+        WHERE t.user_id = :user AND t.ts >= :week_start_ts AND t.ts < :week_end_ts AND t.type = 'OUT'
+    )
+    SELECT b.id, b.category, b.amount, COALESCE(SUM(s.total), 0) AS spent, b.account_id, b.period,
+           CASE b.period WHEN 'week' THEN :week_start ELSE :month_start END AS period_start
+    FROM budgets b
+    LEFT JOIN spend s ON s.period = b.period
+        AND (b.account_id IS NULL OR s.account_id = b.account_id)
+        AND s.category = b.category
+    WHERE b.user_id = :user
+    GROUP BY b.id ORDER BY b.id
+'''
+
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA mmap_size=134217728',
+)
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by every session in the process."""
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE):
+        self.path = path
+        self.closed = False
+        self._idle = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._idle.put(self._connect())
+        self.versions = DataVersions(self._connect())
+        self.cache = QueryCache()
+        self.frames = FrameCache()
+        self.writer = (GroupCommitWriter(self._connect(), self._write_alone, GROUP_COMMIT_MS / 1000, GROUP_COMMIT_BATCH)
+                       if GROUP_COMMIT else None)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, factory=connection_factory())
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = None
+        while conn is None and not self.closed:
+            try:
+                # Timed so a caller waiting when the pool is closed notices instead of waiting for ever.
+                conn = self._idle.get(timeout=1)
+            except queue.Empty:
+                pass
+        if conn is None:
+            # A closed (evicted) pool still held by a caller hands out one-off connections.
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self.closed:
+                conn.close()
+            else:
+                self._idle.put_nowait(conn)
+
+    @contextmanager
+    def write(self):
+        """Connection inside a write transaction, committed on exit: grouped with concurrent writes when
+        group commit is on, else a pooled connection committing on its own."""
+        if self.writer is None:
+            with self._write_alone() as conn:
+                yield conn
+        else:
+            with self.writer.transaction() as conn:
+                yield conn
+
+    @contextmanager
+    def _write_alone(self):
+        with self.connection() as conn, conn:
+            yield conn
+
+    def close(self):
+        """Close the idle connections and the version watcher; borrowed ones close as they are handed back."""
+        self.closed = True
+        self.versions.close()
+        if self.writer is not None:
+            self.writer.close()
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class ShardPools:
+    """LRU of per-shard ConnectionPools keyed by file path, at most ``limit`` open at once."""
+
+    def __init__(self, limit=MAX_OPEN_SHARDS, size=SHARD_POOL_SIZE):
+        self.limit = limit
+        self.size = size
+        self._pools = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        with self._lock:
+            pool = self._pools.get(path)
+            if pool is not None:
+                self._pools.move_to_end(path)
+                return pool
+        # Opened outside the lock so a slow migration does not stall other tenants.
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        pool = ConnectionPool(path, self.size)
+        with pool.connection() as conn:
+            migrate(conn)
+        with self._lock:
+            if path in self._pools:
+                pool.close()
+                pool = self._pools[path]
+            self._pools[path] = pool
+            self._pools.move_to_end(path)
+            evicted = [self._pools.popitem(last=False)[1] for _ in range(len(self._pools) - self.limit)]
+        for old in evicted:
+            old.close()
+        return pool
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), OrderedDict()
+        for pool in pools:
+            pool.close()
+
+
+def _as_datetime(value, end_of_day=False):
+    """date, datetime or ISO string as a naive datetime to the second; a bare date means its first (or last) second."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value) if len(value) > 10 else date_type.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.max.time() if end_of_day else datetime.min.time())
+    return value.replace(microsecond=0)
+
+
+def _epoch(value, end_of_day=False):
+    """Seconds since 1970 for the naive wall-clock time, matching the ts column (strftime('%s', date))."""
+    return calendar.timegm(_as_datetime(value, end_of_day).timetuple())
+
+
+def _ledger_entry(account_id, trans_type, amount, date, trans_id):
+    """(account_id, signed amount, date, transaction id) as taken by FinanceManager._post_ledger."""
+    return account_id, amount if trans_type == 'IN' else -amount, date, trans_id
+
+
+def _from_epoch(ts):
+    """Inverse of _epoch: the naive datetime of a ts value."""
+    return datetime(1970, 1, 1) + timedelta(seconds=ts)
+
+
+def _rollup_table(category):
+    # A category filter has to read the per-category rollups; otherwise each transaction is counted once.
+    return 'category_rollups' if category else 'monthly_rollups'
+
+
+def _category_names(category):
+    """The distinct names in a comma-separated category label, in order."""
+    return list(dict.fromkeys(name.strip() for name in (category or '').split(',') if name.strip()))
+
+
+def _date_text(value, end_of_day=False):
+    return _as_datetime(value, end_of_day).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _frame_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.int64()), ('date', pa.timestamp('s')), ('type', pa.string()), ('amount', pa.int64()),
+        ('account_id', pa.int64()), ('description', pa.string()), ('payment_method', pa.string()),
+        ('category', pa.string()),
+    ])
+
+
+def _frame(rows):
+    """DataFrame of FRAME_COLUMNS rows from a cursor (or list), fetched in batches straight into columns
+    (see columnar): datetime64 dates from the integer ts, int64 piasters, categorical type / payment_method
+    / category."""
+    import pandas as pd
+
+    with span('DataFrame'):
+        if HAVE_ARROW:
+            df = arrow_table(rows, _frame_schema()).to_pandas(categories=list(CATEGORICAL_COLUMNS))
+        else:
+            df = pd.DataFrame(numpy_columns(rows, {name: 'int64' if name in ('id', 'date', 'amount') else 'object'
+                                                   for name in FRAME_NAMES}))
+            df['date'] = pd.to_datetime(df['date'], unit='s')
+        return df.astype(FRAME_DTYPES)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_shards = ShardPools()
+
+
+def shard_path(user_id):
+    """Database file holding ``user_id``'s data when sharding is on; stable across processes."""
+    digest = hashlib.sha256(str(user_id).encode('utf-8')).hexdigest()
+    name = f'bucket-{int(digest, 16) % SHARD_BUCKETS:04d}.db' if SHARD_BUCKETS > 0 else f'user-{digest[:24]}.db'
+    return os.path.join(SHARD_DIR, name)
+
+
+def get_pool(user_id=None):
+    """Return the process-wide pool, creating the schema on first use only.
+
+    With sharding on, a ``user_id`` selects the pool of that user's shard instead; the main pool is the
+    auth database (users, app_settings) in either mode.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool()
+                with pool.connection() as conn:
+                    migrate(conn)
+                    _initialize_sample_data(conn)
+                _pool = pool
+    if SHARD_DIR and user_id is not None:
+        return _shards.get(shard_path(user_id))
+    return _pool
+
+
+def _initialize_sample_data(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM users WHERE username='mohamed'")
+    if cursor.fetchone()[0] > 0:
+        return
+
+    cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)",
+                   ('mohamed', auth.hash_password('123')))
+
+    # Sample accounts and transactions can be added here...
+
+    conn.commit()
+
 
 class FinanceManager:
     def __init__(self, user_id=None):
-        self.conn = sqlite3.connect('finance.db', check_same_thread=False)
+        self.pool = get_pool(user_id)
+        self.auth_pool = get_pool()
         self.user_id = user_id
-        self.create_tables()
-        self._initialize_sample_data()
 
-    def _initialize_sample_data(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM users WHERE username='mohamed'")
-        if cursor.fetchone()[0] > 0:
-            return
-        
-        cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", 
-                       ('mohamed', bcrypt.hashpw('123'.encode('utf-8'), bcrypt.gensalt())))
-        
-        # Sample accounts and transactions can be added here...
-
-        self.conn.commit()
-
-    def create_tables(self):
-        with self.conn:
-            self.conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    username TEXT PRIMARY KEY,
-                    password TEXT NOT NULL
-                )
-            ''')
-            self.conn.execute('''
-                CREATE TABLE IF NOT EXISTS accounts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    name TEXT,
-                    balance REAL,
-                    min_balance REAL,
-                    created_at TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users(username)
-                )
-            ''')
-            self.conn.execute('''
-                CREATE TABLE IF NOT EXISTS transactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    date TEXT,
-                    type TEXT,
-                    amount REAL,
-                    account_id INTEGER,
-                    description TEXT,
-                    payment_method TEXT,
-                    category TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users(username),
-                    FOREIGN KEY (account_id) REFERENCES accounts(id)
-                )
-            ''')
+    @contextmanager
+    def _writing(self, rewrites=False):
+        """Pooled connection inside a write transaction that also bumps this user's data version.
+
+        Pass ``rewrites=True`` when existing transactions are updated or deleted, so cached frames reload
+        instead of only appending the new rows.
+        """
+        with self.pool.write() as conn:
+            yield conn
+            self._bump_version(conn, rewrites)
+
+    def _bump_version(self, conn, rewrites):
+        conn.execute('''
+            INSERT INTO data_versions (user_id, version, rewrites) VALUES (?, 1, ?)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1, rewrites = rewrites + excluded.rewrites
+        ''', (self.user_id, int(rewrites)))
+
+    def _submit(self, work, rewrites=False):
+        """Future of ``work(conn)`` run like a _writing block; already done unless group commit is on."""
+        writer = self.pool.writer
+        if writer is not None:
+            def versioned(conn):
+                result = work(conn)
+                self._bump_version(conn, rewrites)
+                return result
+            return writer.submit(versioned)
+        future = Future()
+        try:
+            with self._writing(rewrites) as conn:
+                future.set_result(work(conn))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def _cached(self, name, args, load):
+        """Serve ``load(conn)`` from the query cache while the user's data version is unchanged."""
+        key = (self.user_id, name, args)
+        with self.pool.connection() as conn:
+            version = self.pool.versions.current(conn, self.user_id)
+            hit, value = self.pool.cache.get(key, version)
+            if not hit:
+                value = load(conn)
+                self.pool.cache.put(key, version, value)
+        return value
+
+    def query_stats(self, limit=20):
+        """Statement timings collected when FINANCE_SQL_PROFILE=1, plus query-cache counters."""
+        return {
+            'top': query_log.top(limit),
+            'slow': list(query_log.slow)[-limit:],
+            'cache_hits': self.pool.cache.hits,
+            'cache_misses': self.pool.cache.misses,
+            'frame_hits': self.pool.frames.hits,
+            'frame_appends': self.pool.frames.appends,
+            'frame_loads': self.pool.frames.loads,
+            'group_commits': self.pool.writer.commits if self.pool.writer else None,
+            'group_writes': self.pool.writer.writes if self.pool.writer else None,
+        }
 
     def add_user(self, username, password):
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        with self.conn:
+        hashed_password = auth.hash_password(password)
+        try:
+            with self.auth_pool.write() as conn:
+                conn.execute('INSERT INTO users (username, password) VALUES (?, ?)', (username, hashed_password))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def _password_hash(self, username):
+        with self.auth_pool.connection() as conn:
+            row = conn.execute('SELECT password FROM users WHERE username = ?', (username,)).fetchone()
+        return row[0] if row else None
+
+    def verify_user(self, username, password):
+        hashed = self._password_hash(username)
+        if not hashed or not auth.check_password(password, hashed):
+            return False
+        if auth.needs_rehash(hashed):
             try:
-                self.conn.execute('INSERT INTO users (username, password) VALUES (?, ?)', (username, hashed_password))
-                self.conn.commit()
-                return True
-            except sqlite3.IntegrityError:
+                rehashed = auth.hash_password(password)  # outside the transaction: bcrypt must not hold the write lock
+            except auth.HashBusy:
+                return True  # the login stands; the hash is upgraded next time
+            with self.auth_pool.write() as conn:
+                conn.execute('UPDATE users SET password = ? WHERE username = ? AND password = ?',
+                             (rehashed, username, hashed))
+        return True
+
+    def _session_secret(self):
+        secret = os.environ.get('FINANCE_SESSION_SECRET')
+        if secret:
+            return secret
+        with self.auth_pool.connection() as conn:
+            return conn.execute("SELECT value FROM app_settings WHERE key = 'session_secret'").fetchone()[0]
+
+    def issue_session_token(self, username):
+        """Signed token for ``username``; call only after verify_user succeeded."""
+        return auth.issue_token(self._session_secret(), username, self._password_hash(username))
+
+    def user_from_session_token(self, token):
+        """Username the token was issued for, or None if it is forged, expired or the password changed."""
+        username = auth.token_username(token)
+        hashed = username and self._password_hash(username)
+        if hashed and auth.check_token(self._session_secret(), token, hashed):
+            return username
+        return None
+
+    def add_account(self, name, opening_balance, min_balance):
+        with self._writing() as conn:
+            cursor = conn.execute('''
+                INSERT INTO accounts (user_id, name, balance, min_balance, created_at, opening_balance)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (self.user_id, name, opening_balance, min_balance, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), opening_balance))
+            return cursor.lastrowid
+
+    def update_account(self, account_id, name, min_balance, balance=None):
+        """Rename an account or change its threshold; a new balance is booked as an adjustment transaction."""
+        with self._writing() as conn:
+            conn.execute('UPDATE accounts SET name = ?, min_balance = ? WHERE user_id = ? AND id = ?',
+                         (name, min_balance, self.user_id, account_id))
+            if balance is None:
+                return
+            current = conn.execute('SELECT balance FROM accounts WHERE user_id = ? AND id = ?',
+                                   (self.user_id, account_id)).fetchone()
+            if current is None or balance == current[0]:
+                return
+            diff = balance - current[0]
+            self._insert_transaction(conn, account_id, abs(diff), 'IN' if diff > 0 else 'OUT',
+                                     'تسوية رصيد', None, 'تسوية', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+    def delete_account(self, account_id):
+        with self._writing() as conn:
+            conn.execute('DELETE FROM accounts WHERE user_id = ? AND id = ?', (self.user_id, account_id))
+            conn.execute('DELETE FROM balance_checkpoints WHERE account_id = ?', (account_id,))
+            conn.execute('DELETE FROM budgets WHERE user_id = ? AND account_id = ?', (self.user_id, account_id))
+            conn.execute('DELETE FROM alerts WHERE user_id = ? AND account_id = ?', (self.user_id, account_id))
+
+    def get_all_accounts(self):
+        return self._cached('accounts', (), lambda conn: conn.execute(
+            'SELECT * FROM accounts WHERE user_id = ? ORDER BY id', (self.user_id,)).fetchall())
+
+    def get_all_transactions(self):
+        return self._cached('transactions', (), lambda conn: conn.execute(
+            f'SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE user_id = ? ORDER BY ts, id', (self.user_id,)).fetchall())
+
+    def _category_ids(self, conn, names):
+        """Ids of the user's categories called ``names``, creating any that are missing."""
+        conn.executemany('INSERT OR IGNORE INTO categories (user_id, name) VALUES (?, ?)',
+                         [(self.user_id, name) for name in names])
+        return dict(conn.execute(
+            f'SELECT name, id FROM categories WHERE user_id = ? AND name IN ({",".join("?" * len(names))})',
+            [self.user_id] + list(names)).fetchall())
+
+    def _link_categories(self, conn, labelled):
+        """Link each (transaction id, category label) pair to the categories named in its label."""
+        names = {trans_id: _category_names(category) for trans_id, category in labelled}
+        ids = self._category_ids(conn, sorted({name for row in names.values() for name in row}))
+        conn.executemany('INSERT OR IGNORE INTO transaction_categories (transaction_id, category_id) VALUES (?, ?)',
+                         [(trans_id, ids[name]) for trans_id, row in names.items() for name in row])
+
+    def add_custom_category(self, account_id, trans_type, name):
+        name = name.strip()
+        with self._writing() as conn:
+            category_id = self._category_ids(conn, [name])[name]
+            conn.execute('INSERT OR IGNORE INTO custom_categories (user_id, account_id, type, name, category_id) VALUES (?, ?, ?, ?, ?)',
+                         (self.user_id, account_id, trans_type, name, category_id))
+            return category_id
+
+    def get_custom_categories(self, account_id, trans_type):
+        """(name, category_id) pairs offered for this account and transaction type."""
+        return self._cached('categories', (account_id, trans_type), lambda conn: conn.execute(
+            'SELECT name, category_id FROM custom_categories WHERE user_id = ? AND account_id = ? AND type = ? ORDER BY name',
+            (self.user_id, account_id, trans_type)).fetchall())
+
+    def delete_custom_category(self, account_id, trans_type, category_id):
+        """Stop offering a category; transactions already tagged with it keep it."""
+        with self._writing() as conn:
+            conn.execute('DELETE FROM custom_categories WHERE user_id = ? AND account_id = ? AND type = ? AND category_id = ?',
+                         (self.user_id, account_id, trans_type, category_id))
+
+    def get_categories(self):
+        """(id, name) of every category the user has used or offered, by name."""
+        return self._cached('all_categories', (), lambda conn: conn.execute(
+            'SELECT id, name FROM categories WHERE user_id = ? ORDER BY name', (self.user_id,)).fetchall())
+
+    def add_budget(self, category, amount, account_id=None, period='month'):
+        """Budget for spending in ``category`` per calendar month or week; account_id None covers every account."""
+        with self._writing() as conn:
+            budget_id = conn.execute('''
+                INSERT INTO budgets (user_id, account_id, category, amount, period, created_at) VALUES (?, ?, ?, ?, ?, ?)
+            ''', (self.user_id, account_id, category.strip(), amount, period,
+                  datetime.now().strftime('%Y-%m-%d %H:%M:%S'))).lastrowid
+            self._raise_budget_alerts(conn)
+            return budget_id
+
+    def delete_budget(self, budget_id):
+        with self._writing() as conn:
+            conn.execute('DELETE FROM budgets WHERE user_id = ? AND id = ?', (self.user_id, budget_id))
+            conn.execute('DELETE FROM alerts WHERE user_id = ? AND budget_id = ?', (self.user_id, budget_id))
+
+    def _budget_params(self, as_of):
+        month_start = as_of.replace(day=1)
+        week_start = as_of - timedelta(days=as_of.weekday())
+        return {
+            'user': self.user_id, 'month': month_start.strftime('%Y-%m'), 'month_start': month_start.isoformat(),
+            'week_start': week_start.isoformat(), 'week_start_ts': _epoch(week_start),
+            'week_end_ts': _epoch(week_start + timedelta(days=7)),
+        }
+
+    def get_budgets(self, as_of=None):
+        """(id, category, allocated, spent, account_id, period, period_start) for the periods containing ``as_of``.
+
+        Spend restarts every period; all budgets come from one grouped query (BUDGET_SPEND_SQL).
+        """
+        as_of = as_of or date_type.today()
+        params = self._budget_params(as_of)
+        return self._cached('budgets', (as_of,), lambda conn: conn.execute(BUDGET_SPEND_SQL, params).fetchall())
+
+    def check_alerts(self):
+        """Unread alerts as one warning text (newest first), or an empty string."""
+        return "\n".join(message for _, message, _, _ in self.get_alerts())
+
+    def get_alerts(self, unread_only=True, limit=20):
+        """Newest alert events as (id, message, created_at, read) tuples.
+
+        Events are written when a threshold is crossed: low balances by triggers on accounts,
+        budget overruns by the transaction write path, so reading them is a short indexed scan.
+        """
+        def load(conn):
+            rows = conn.execute(f'''
+                SELECT a.id, a.kind, a.amount, a.threshold, a.period_start, a.created_at, a.read_at, acc.name, b.category
+                FROM alerts a
+                LEFT JOIN accounts acc ON acc.id = a.account_id
+                LEFT JOIN budgets b ON b.id = a.budget_id
+                WHERE a.user_id = ? {'AND a.read_at IS NULL' if unread_only else ''}
+                ORDER BY a.id DESC LIMIT ?
+            ''', (self.user_id, limit)).fetchall()
+            alerts = []
+            for alert_id, kind, amount, threshold, period_start, created_at, read_at, account_name, category in rows:
+                if kind == 'low_balance':
+                    message = f"⚠️ رصيد حساب {account_name} ({format_money(amount)}) أقل من الحد الأدنى ({format_money(threshold)})"
+                else:
+                    message = f"⚠️ تجاوزت ميزانية {category} للفترة من {period_start}: منفق {format_money(amount)} من {format_money(threshold)}"
+                alerts.append((alert_id, message, created_at, read_at is not None))
+            return alerts
+        return self._cached('alerts', (unread_only, limit), load)
+
+    def mark_alerts_read(self, alert_ids=None):
+        """Mark the given alerts, or all of the user's unread alerts, as read."""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._writing() as conn:
+            if alert_ids is None:
+                conn.execute('UPDATE alerts SET read_at = ? WHERE user_id = ? AND read_at IS NULL', (now, self.user_id))
+            else:
+                conn.executemany('UPDATE alerts SET read_at = ? WHERE user_id = ? AND id = ? AND read_at IS NULL',
+                                 [(now, self.user_id, alert_id) for alert_id in alert_ids])
+
+    def _raise_budget_alerts(self, conn):
+        """Record an overrun event for every budget over its allocation this period; at most one per period."""
+        conn.execute(f'''
+            INSERT OR IGNORE INTO alerts (user_id, kind, account_id, budget_id, period_start, amount, threshold, created_at)
+            SELECT :user, 'budget', account_id, id, period_start, spent, amount, :now
+            FROM ({BUDGET_SPEND_SQL}) WHERE spent > amount
+        ''', dict(self._budget_params(date_type.today()), now=datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+
+    def _category_clause(self, category):
+        """Match ``category_id`` against a category id or, for a string, the user's category of that name."""
+        if isinstance(category, int):
+            return 'category_id = ?', [category]
+        return 'category_id = (SELECT id FROM categories WHERE user_id = ? AND name = ?)', [self.user_id, category]
+
+    def _transaction_filters(self, account_id=None, start_date=None, end_date=None, trans_type=None, category=None, search=None):
+        clauses = ['user_id = ?']
+        params = [self.user_id]
+        if account_id is not None:
+            clauses.append('account_id = ?')
+            params.append(account_id)
+        if start_date:
+            clauses.append('ts >= ?')
+            params.append(_epoch(start_date))
+        if end_date:
+            clauses.append('ts <= ?')
+            params.append(_epoch(end_date, end_of_day=True))
+        if trans_type:
+            clauses.append('type = ?')
+            params.append(trans_type)
+        if category:
+            clause, category_params = self._category_clause(category)
+            clauses.append(f'id IN (SELECT transaction_id FROM transaction_categories WHERE {clause})')
+            params.extend(category_params)
+        match = match_expression(search, self.user_id) if search else None
+        if match:
+            clauses.append('id IN (SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH ?)')
+            params.append(match)
+        return ' AND '.join(clauses), params
+
+    def filter_transactions(self, account_id=None, start_date=None, end_date=None, trans_type=None, category=None, as_frame=False):
+        """Matching transactions oldest first. Dates may be date/datetime objects or ISO strings; an end date is inclusive."""
+        where, params = self._transaction_filters(account_id, start_date, end_date, trans_type, category)
+        if as_frame:
+            # Slice the shared frame by the matching ids (an index-only read) rather than building another one.
+            frame = self.get_transactions_frame()
+            with self.pool.connection() as conn:
+                ids = [trans_id for (trans_id,) in conn.execute(f'SELECT id FROM transactions WHERE {where}', params)]
+            return frame[frame['id'].isin(ids)].reset_index(drop=True)
+        with self.pool.connection() as conn:
+            return conn.execute(f'SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE {where} ORDER BY ts, id', params).fetchall()
+
+    def get_transactions_frame(self):
+        """Every transaction of the user as one compact frame, oldest first (see frame_cache).
+
+        The frame is shared between sessions: copy it before modifying.
+        """
+        frames = self.pool.frames
+        with self.pool.connection() as conn:
+            version = self.pool.versions.current(conn, self.user_id)
+            entry = frames.get(self.user_id)
+            if entry is not None and entry[0] == version:
+                frames.hits += 1
+                return entry[2]
+            version, rewrites = conn.execute('SELECT version, rewrites FROM data_versions WHERE user_id = ?',
+                                             (self.user_id,)).fetchone() or (0, 0)
+            if entry is not None and entry[1] == rewrites:
+                frames.appends += 1
+                frame = entry[2]
+                last_id = int(frame['id'].max()) if len(frame) else 0
+                frame = append_frames(frame, _frame(conn.execute(
+                    f'SELECT {FRAME_COLUMNS} FROM transactions WHERE user_id = ? AND id > ? ORDER BY ts, id',
+                    (self.user_id, last_id))))
+            else:
+                frames.loads += 1
+                frame = _frame(conn.execute(f'SELECT {FRAME_COLUMNS} FROM transactions WHERE user_id = ? ORDER BY ts, id',
+                                            (self.user_id,)))
+        frames.put(self.user_id, version, rewrites, frame)
+        return frame
+
+    def iter_transactions(self, batch_size=5000, account_id=None, start_date=None, end_date=None,
+                          trans_type=None, category=None, search=None):
+        """Yield matching transactions oldest-first in lists of at most ``batch_size`` rows."""
+        where, params = self._transaction_filters(account_id, start_date, end_date, trans_type, category, search)
+        with self.pool.connection() as conn:
+            cursor = conn.execute(f'SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE {where} ORDER BY ts, id', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    def get_transactions_page(self, cursor=None, limit=50, account_id=None, start_date=None, end_date=None,
+                              trans_type=None, category=None, search=None, as_frame=False):
+        """One page of transactions, newest first, seeking past ``cursor``.
+
+        ``cursor`` is the (ts, id) of the previous page's last row. Returns (rows, next_cursor), where
+        next_cursor is None on the last page; rows is a DataFrame when ``as_frame``.
+        """
+        where, params = self._transaction_filters(account_id, start_date, end_date, trans_type, category, search)
+        if cursor:
+            where += ' AND (ts, id) < (?, ?)'
+            params.extend(cursor)
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'SELECT {FRAME_COLUMNS if as_frame else TRANSACTION_COLUMNS} FROM transactions '
+                                f'WHERE {where} ORDER BY ts DESC, id DESC LIMIT ?', params + [limit + 1]).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][1], rows[-1][0]) if as_frame else (_epoch(rows[-1][2]), rows[-1][0])
+        return (_frame(rows) if as_frame else rows), next_cursor
+
+    def search_transactions(self, query, limit=50, offset=0):
+        """Newest-first transactions whose description, category or payment method match every word of ``query`` as a prefix."""
+        match = match_expression(query, self.user_id)
+        if not match:
+            return []
+        with self.pool.connection() as conn:
+            return conn.execute(f'''
+                SELECT {', '.join('t.' + col for col in TRANSACTION_COLUMNS.split(', '))}
+                FROM transactions_fts f JOIN transactions t ON t.id = f.rowid
+                WHERE transactions_fts MATCH ? AND t.user_id = ?
+                ORDER BY t.ts DESC, t.id DESC LIMIT ? OFFSET ?
+            ''', (match, self.user_id, limit, offset)).fetchall()
+
+    def get_summary(self, account_id=None, start=None, end=None, category=None, trans_type=None, search=None):
+        """Income, expenses, net and row count for the matching transactions, in one aggregate query."""
+        where, params = self._transaction_filters(account_id, start, end, trans_type, category, search)
+        with self.pool.connection() as conn:
+            income, expenses, count = conn.execute(f'''
+                SELECT COALESCE(SUM(CASE WHEN type = 'IN' THEN amount END), 0),
+                       COALESCE(SUM(CASE WHEN type = 'OUT' THEN amount END), 0),
+                       COUNT(*)
+                FROM transactions WHERE {where}
+            ''', params).fetchone()
+        return {'income': income, 'expenses': expenses, 'net': income - expenses, 'count': count}
+
+    def get_date_range(self, account_id=None, start_date=None, end_date=None, trans_type=None, category=None):
+        """(first, last) transaction dates matching the filters, or (None, None).
+
+        MIN and MAX of ts are separate subqueries: SQLite only answers a lone
+        MIN or MAX with a seek on idx_transactions_user_ts."""
+        where, params = self._transaction_filters(account_id, start_date, end_date, trans_type, category)
+        with self.pool.connection() as conn:
+            first, last = conn.execute(f'''
+                SELECT (SELECT MIN(ts) FROM transactions WHERE {where}),
+                       (SELECT MAX(ts) FROM transactions WHERE {where})
+            ''', params * 2).fetchone()
+        return tuple(None if ts is None else _from_epoch(ts).date() for ts in (first, last))
+
+    def get_time_series(self, bucket='day', account_id=None, start_date=None, end_date=None, trans_type=None, category=None):
+        """(bucket start 'YYYY-MM-DD', type, total, count) rows, summed per day, week (Monday) or month (month_key) in SQL."""
+        where, params = self._transaction_filters(account_id, start_date, end_date, trans_type, category)
+        with self.pool.connection() as conn:
+            return conn.execute(f'''
+                SELECT {BUCKET_SQL[bucket]} AS bucket, type, SUM(amount), COUNT(*)
+                FROM transactions WHERE {where}
+                GROUP BY bucket, type ORDER BY bucket
+            ''', params).fetchall()
+
+    def add_transaction(self, account_id, amount, trans_type, description, payment_method, category, date=None):
+        return self.submit_transaction(account_id, amount, trans_type, description, payment_method, category, date).result()
+
+    def submit_transaction(self, account_id, amount, trans_type, description, payment_method, category, date=None):
+        """add_transaction without waiting: a Future of the new id, resolved once the insert is committed."""
+        date = _date_text(date or datetime.now())
+
+        def insert(conn):
+            trans_id = self._insert_transaction(conn, account_id, amount, trans_type, description, payment_method, category, date)
+            self._raise_budget_alerts(conn)
+            return trans_id
+        return self._submit(insert)
+
+    def update_transaction(self, trans_id, account_id, amount, trans_type, description, payment_method, category, date=None):
+        with self._writing(rewrites=True) as conn:
+            old = conn.execute('SELECT account_id, type, amount, date, category FROM transactions WHERE user_id = ? AND id = ?',
+                               (self.user_id, trans_id)).fetchone()
+            if old is None:
                 return False
+            date = _date_text(date) if date else old[3]
+            conn.execute('''
+                UPDATE transactions SET date = ?, type = ?, amount = ?, account_id = ?, description = ?, payment_method = ?, category = ?
+                WHERE user_id = ? AND id = ?
+            ''', (date, trans_type, amount, account_id, description, payment_method, category, self.user_id, trans_id))
+            if _category_names(category) != _category_names(old[4]):
+                conn.execute('DELETE FROM transaction_categories WHERE transaction_id = ?', (trans_id,))
+                self._link_categories(conn, [(trans_id, category)])
+            self._post_ledger(conn, [_ledger_entry(old[0], old[1], -old[2], old[3], trans_id),
+                                     _ledger_entry(account_id, trans_type, amount, date, trans_id)])
+            self._raise_budget_alerts(conn)
+            return True
 
-    def verify_user(self, username, password):
-        with self.conn:
-            cursor = self.conn.execute('SELECT password FROM users WHERE username = ?', (username,))
-            result = cursor.fetchone()
-            return result and bcrypt.checkpw(password.encode('utf-8'), result[0])
+    def delete_transaction(self, trans_id):
+        with self._writing(rewrites=True) as conn:
+            old = conn.execute('SELECT account_id, type, amount, date FROM transactions WHERE user_id = ? AND id = ?',
+                               (self.user_id, trans_id)).fetchone()
+            if old is None:
+                return False
+            conn.execute('DELETE FROM transactions WHERE user_id = ? AND id = ?', (self.user_id, trans_id))
+            self._post_ledger(conn, [_ledger_entry(old[0], old[1], -old[2], old[3], trans_id)])
+            return True
+
+    def import_transactions(self, account_id, rows, batch_size=IMPORT_BATCH_SIZE, progress=None):
+        """Bulk-insert statement rows into one account, skipping any whose import_hash was already imported.
+
+        ``rows`` yields (date, type, amount, description, payment_method, category, import_hash) tuples. Each
+        batch is one executemany in one transaction with a single balance update. ``progress`` is called
+        with (inserted, skipped) after every batch. Returns the final (inserted, skipped).
+        """
+        inserted = skipped = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                added = self._import_batch(account_id, batch)
+                inserted, skipped = inserted + added, skipped + len(batch) - added
+                batch = []
+                if progress:
+                    progress(inserted, skipped)
+        if batch:
+            added = self._import_batch(account_id, batch)
+            inserted, skipped = inserted + added, skipped + len(batch) - added
+            if progress:
+                progress(inserted, skipped)
+        return inserted, skipped
+
+    def _import_batch(self, account_id, batch):
+        with self._writing() as conn:
+            hashes = list({row[6] for row in batch})
+            seen = {h for (h,) in conn.execute(
+                f'SELECT import_hash FROM transactions WHERE user_id = ? AND import_hash IN ({",".join("?" * len(hashes))})',
+                [self.user_id] + hashes)}
+            fresh = []
+            for row in batch:
+                if row[6] not in seen:
+                    seen.add(row[6])
+                    fresh.append(row)
+            if not fresh:
+                return 0
+            conn.executemany('''
+                INSERT INTO transactions (user_id, account_id, date, type, amount, description, payment_method, category, import_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(self.user_id, account_id) + tuple(row) for row in fresh])
+            fresh_hashes = [row[6] for row in fresh]
+            inserted = conn.execute(f'''
+                SELECT id, category, date, CASE type WHEN 'IN' THEN amount ELSE -amount END FROM transactions
+                WHERE user_id = ? AND import_hash IN ({",".join("?" * len(fresh_hashes))})
+            ''', [self.user_id] + fresh_hashes).fetchall()
+            self._link_categories(conn, [row[:2] for row in inserted])
+            self._post_ledger(conn, [(account_id, delta, date, trans_id) for trans_id, _, date, delta in inserted])
+            self._raise_budget_alerts(conn)
+            return len(fresh)
+
+    def _insert_transaction(self, conn, account_id, amount, trans_type, description, payment_method, category, date):
+        cursor = conn.execute('''
+            INSERT INTO transactions (user_id, date, type, amount, account_id, description, payment_method, category)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (self.user_id, date, trans_type, amount, account_id, description, payment_method, category))
+        self._link_categories(conn, [(cursor.lastrowid, category)])
+        self._post_ledger(conn, [_ledger_entry(account_id, trans_type, amount, date, cursor.lastrowid)])
+        return cursor.lastrowid
+
+    def _post_ledger(self, conn, entries):
+        """Apply _ledger_entry tuples to the account balances; must run inside the caller's write transaction."""
+        # A checkpoint holds the balance after every entry up to (as_of_date, as_of_id), so a back-dated
+        # entry at or before that position shifts it. All shifts go first: a checkpoint written below
+        # is computed from the transactions as they are now.
+        conn.executemany('''
+            UPDATE balance_checkpoints SET balance = balance + ?
+            WHERE account_id = ? AND (as_of_date, as_of_id) >= (?, ?)
+        ''', [(delta, account_id, date, trans_id) for account_id, delta, date, trans_id in entries])
+        totals = {}
+        for account_id, delta, _, _ in entries:
+            total, count = totals.get(account_id, (0, 0))
+            totals[account_id] = (total + delta, count + 1)
+        for account_id, (delta, count) in totals.items():
+            row = conn.execute('''
+                UPDATE accounts SET balance = balance + ?, entries_since_checkpoint = entries_since_checkpoint + ?
+                WHERE user_id = ? AND id = ? RETURNING entries_since_checkpoint
+            ''', (delta, count, self.user_id, account_id)).fetchone()
+            if row and row[0] >= CHECKPOINT_INTERVAL:
+                self._write_checkpoint(conn, account_id)
+
+    def _write_checkpoint(self, conn, account_id):
+        last = conn.execute('''
+            SELECT date, id FROM transactions WHERE user_id = ? AND account_id = ? ORDER BY date DESC, id DESC LIMIT 1
+        ''', (self.user_id, account_id)).fetchone()
+        if last is None:
+            return
+        conn.execute('INSERT OR REPLACE INTO balance_checkpoints (account_id, as_of_date, as_of_id, balance) VALUES (?, ?, ?, ?)',
+                     (account_id, last[0], last[1], self._balance_at(conn, account_id, *last)))
+        conn.execute('UPDATE accounts SET entries_since_checkpoint = 0 WHERE user_id = ? AND id = ?', (self.user_id, account_id))
+
+    def _balance_at(self, conn, account_id, date, trans_id):
+        """Balance after every entry up to (date, trans_id): nearest checkpoint plus the entries since it."""
+        checkpoint = conn.execute('''
+            SELECT as_of_date, as_of_id, balance FROM balance_checkpoints
+            WHERE account_id = ? AND (as_of_date, as_of_id) <= (?, ?)
+            ORDER BY as_of_date DESC, as_of_id DESC LIMIT 1
+        ''', (account_id, date, trans_id)).fetchone()
+        if checkpoint:
+            base, since = checkpoint[2], checkpoint[:2]
+        else:
+            opening = conn.execute('SELECT opening_balance FROM accounts WHERE user_id = ? AND id = ?',
+                                   (self.user_id, account_id)).fetchone()
+            base, since = (opening[0] if opening else 0), ('', 0)
+        delta = conn.execute('''
+            SELECT COALESCE(SUM(CASE WHEN type = 'IN' THEN amount ELSE -amount END), 0) FROM transactions
+            WHERE user_id = ? AND account_id = ? AND date >= ? AND date <= ?
+              AND (date, id) > (?, ?) AND (date, id) <= (?, ?)
+        ''', (self.user_id, account_id, since[0], date, *since, date, trans_id)).fetchone()[0]
+        return base + delta
+
+    def get_balance_at(self, account_id, date):
+        """Account balance at the end of ``date`` (a date/datetime or 'YYYY-MM-DD[ HH:MM:SS]' string)."""
+        date = _date_text(date, end_of_day=True)
+        with self.pool.connection() as conn:
+            return self._balance_at(conn, account_id, date, END_OF_TIME[1])
+
+    def verify_balances(self, tolerance=0):
+        """Accounts whose stored balance disagrees with the ledger, as (id, name, stored, expected) tuples."""
+        drifted = []
+        with self.pool.connection() as conn:
+            for account_id, name, stored in conn.execute('SELECT id, name, balance FROM accounts WHERE user_id = ?',
+                                                          (self.user_id,)).fetchall():
+                expected = self._balance_at(conn, account_id, *END_OF_TIME)
+                if abs((stored or 0) - expected) > tolerance:
+                    drifted.append((account_id, name, stored, expected))
+        return drifted
+
+    def _rollup_filters(self, account_id=None, trans_type=None, category=None, start_month=None, end_month=None):
+        clauses = ['user_id = ?']
+        params = [self.user_id]
+        if account_id is not None:
+            clauses.append('account_id = ?')
+            params.append(account_id)
+        if trans_type:
+            clauses.append('type = ?')
+            params.append(trans_type)
+        if category:
+            clause, category_params = self._category_clause(category)
+            clauses.append(clause)
+            params.extend(category_params)
+        if start_month:
+            clauses.append('month >= ?')
+            params.append(start_month)
+        if end_month:
+            clauses.append('month <= ?')
+            params.append(end_month)
+        return ' AND '.join(clauses), params
+
+    def get_month_summary(self, month, account_id=None, category=None, trans_type=None):
+        """Same shape as get_summary for one calendar month ('YYYY-MM'), read from the rollups."""
+        where, params = self._rollup_filters(account_id, trans_type, category, month, month)
+        with self.pool.connection() as conn:
+            income, expenses, count = conn.execute(f'''
+                SELECT COALESCE(SUM(CASE WHEN type = 'IN' THEN total END), 0),
+                       COALESCE(SUM(CASE WHEN type = 'OUT' THEN total END), 0),
+                       COALESCE(SUM(count), 0)
+                FROM {_rollup_table(category)} WHERE {where}
+            ''', params).fetchone()
+        return {'income': income, 'expenses': expenses, 'net': income - expenses, 'count': count}
+
+    def get_category_totals(self, account_id=None, trans_type=None, start_month=None, end_month=None, limit=None):
+        """(name, amount) per category, largest first; a transaction tagged "a, b" counts towards both."""
+        where, params = self._rollup_filters(account_id, trans_type, None, start_month, end_month)
+        query = f'''
+            SELECT c.name, r.amount FROM (
+                SELECT category_id, SUM(total) AS amount FROM category_rollups WHERE {where} GROUP BY category_id
+            ) r JOIN categories c ON c.id = r.category_id
+            ORDER BY r.amount DESC
+        '''
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self.pool.connection() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def get_category_breakdown(self, account_id=None, start_date=None, end_date=None, trans_type=None, category=None,
+                               search=None, limit=None):
+        """get_category_totals for day-precise filters: one indexed join over the matching transactions."""
+        where, params = self._transaction_filters(account_id, start_date, end_date, trans_type, category, search)
+        query = f'''
+            SELECT c.name, SUM(t.amount) AS amount
+            FROM (SELECT id, amount FROM transactions WHERE {where}) t
+            JOIN transaction_categories tc ON tc.transaction_id = t.id
+            JOIN categories c ON c.id = tc.category_id
+            GROUP BY tc.category_id ORDER BY amount DESC
+        '''
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self.pool.connection() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def get_monthly_totals(self, account_id=None, trans_type=None, category=None, start_month=None, end_month=None):
+        where, params = self._rollup_filters(account_id, trans_type, category, start_month, end_month)
+        with self.pool.connection() as conn:
+            return conn.execute(f'''
+                SELECT month, type, SUM(total), SUM(count) FROM {_rollup_table(category)}
+                WHERE {where} GROUP BY month, type ORDER BY month
+            ''', params).fetchall()
 
     # Additional methods for account and transaction management...
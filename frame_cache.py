@@ -0,0 +1,60 @@
+"""Process-wide cache of one compact transactions DataFrame per user.
+
+Frames use categorical dtypes for the low-cardinality text columns, int64
+piasters and no user_id column, and are shared by every session of the
+user, so callers must copy before modifying one. An entry is tagged with
+the user's data version and rewrite counter (data_versions): when only the
+version moved, the writes since were inserts and just the rows past the
+cached max id are fetched and appended; an update or delete of existing
+transactions bumps the rewrite counter and forces a full reload.
+"""
+import threading
+from collections import OrderedDict
+
+MAX_USERS = 32
+CATEGORICAL_COLUMNS = ('type', 'payment_method', 'category')
+
+
+def append_frames(df, extra):
+    """Concatenate two frames of the same layout, widening categories instead of falling back to object."""
+    import pandas as pd
+
+    if extra.empty:
+        return df
+    if df.empty:
+        return extra
+    dtypes = {column: pd.CategoricalDtype(df[column].cat.categories.union(extra[column].cat.categories))
+              for column in CATEGORICAL_COLUMNS}
+    combined = pd.concat([df.astype(dtypes), extra.astype(dtypes)], ignore_index=True)
+    if extra['date'].iloc[0] < df['date'].iloc[-1] or not extra['date'].is_monotonic_increasing:
+        # Back-dated inserts (statement imports, transactions entered with an old date)
+        combined = combined.sort_values(['date', 'id'], ignore_index=True)
+    return combined
+
+
+class FrameCache:
+    """Bounded LRU of (version, rewrites, frame) keyed by user_id."""
+
+    def __init__(self, max_users=MAX_USERS):
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.appends = self.loads = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+            return entry
+
+    def put(self, user_id, version, rewrites, frame):
+        with self._lock:
+            self._entries[user_id] = (version, rewrites, frame)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,139 @@
+"""Group commit: concurrent write transactions share one SQLite COMMIT.
+
+Writers run their statements in their own thread on the writer's dedicated
+connection, each inside a SAVEPOINT of one open transaction, so a failing
+writer only rolls back its own work. A background thread commits that
+transaction as soon as nobody else is queued to write, and at the latest
+``max_delay`` seconds after it began or once ``max_batch`` writers joined.
+A writer's Future resolves only after the COMMIT covering its statements
+returned (or fails with that COMMIT's error), so nothing is reported saved
+before it is. Writers arriving after close() run through ``fallback``, a
+context manager factory yielding a connection in its own transaction.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+
+class GroupCommitWriter:
+    def __init__(self, conn, fallback, max_delay=0.005, max_batch=256):
+        conn.isolation_level = None
+        self._conn = conn
+        self._fallback = fallback
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.closed = False
+        self.commits = self.writes = 0
+        self._cv = threading.Condition()
+        # Writers waiting for the condition's lock; kept under its own lock so the committer sees them.
+        self._queued = 0
+        self._queued_lock = threading.Lock()
+        self._pending = []
+        self._opened = None
+        self._owner = None
+        self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+        self._thread.start()
+
+    def submit(self, work):
+        """Run ``work(conn)`` in the current group; returns a Future of its result, resolved once committed."""
+        future = Future()
+        try:
+            with self._group(future) as (conn, result):
+                result.append(work(conn))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+    @contextmanager
+    def transaction(self):
+        """Yield the writer connection inside this caller's savepoint; exits once the group is committed."""
+        if self._owner == threading.get_ident():
+            # Nested in this thread's own write: a plain savepoint, committed with the outer one.
+            self._conn.execute('SAVEPOINT group_nested')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK TO group_nested')
+                self._conn.execute('RELEASE group_nested')
+                raise
+            self._conn.execute('RELEASE group_nested')
+            return
+        future = Future()
+        with self._group(future) as (conn, _):
+            yield conn
+        future.result()
+
+    @contextmanager
+    def _group(self, future):
+        with self._queued_lock:
+            self._queued += 1
+        with self._cv:
+            with self._queued_lock:
+                self._queued -= 1
+            closed = self.closed
+            if not closed:
+                if self._opened is None:
+                    self._conn.execute('BEGIN IMMEDIATE')
+                    self._opened = time.monotonic()
+                self._conn.execute('SAVEPOINT group_write')
+                result = []
+                self._owner = threading.get_ident()
+                try:
+                    yield self._conn, result
+                except BaseException:
+                    self._owner = None
+                    self._conn.execute('ROLLBACK TO group_write')
+                    self._conn.execute('RELEASE group_write')
+                    if not self._pending:
+                        # Nothing else in the group: give the write lock back now.
+                        self._conn.execute('ROLLBACK')
+                        self._opened = None
+                    raise
+                self._owner = None
+                self._conn.execute('RELEASE group_write')
+                self._pending.append((future, result))
+                self._cv.notify_all()
+        if closed:
+            # Closed (its pool was evicted) while this writer waited: commit on its own instead.
+            with self._fallback() as conn:
+                result = []
+                yield conn, result
+            future.set_result(result[0] if result else None)
+
+    def _run(self):
+        with self._cv:
+            while True:
+                self._cv.wait_for(lambda: self._pending or self.closed)
+                if not self._pending:
+                    return
+                deadline = self._opened + self.max_delay
+                while self._queued and len(self._pending) < self.max_batch and not self.closed:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    self._cv.wait(left)
+                self._commit()
+
+    def _commit(self):
+        pending, self._pending, self._opened = self._pending, [], None
+        try:
+            self._conn.execute('COMMIT')
+        except BaseException as exc:
+            if self._conn.in_transaction:
+                self._conn.execute('ROLLBACK')
+            for future, _ in pending:
+                future.set_exception(exc)
+            return
+        self.commits += 1
+        self.writes += len(pending)
+        for future, result in pending:
+            future.set_result(result[0] if result else None)
+
+    def close(self):
+        """Commit what is pending, stop the thread and close the connection."""
+        with self._cv:
+            self.closed = True
+            self._cv.notify_all()
+        self._thread.join()
+        self._conn.close()
@@ -0,0 +1,158 @@
+"""Bank statement import (CSV and OFX/QFX).
+
+Statements are parsed as a stream and handed to
+FinanceManager.import_transactions, which inserts them in batched
+transactions and skips rows whose content hash was already imported.
+"""
+import csv
+import hashlib
+import io
+import re
+from datetime import datetime
+
+from money import to_major, to_minor
+
+DEFAULT_CATEGORY = "غير مصنف"
+DEFAULT_PAYMENT_METHOD = "تحويل بنكي"
+
+CSV_ALIASES = {
+    "date": ("date", "transaction date", "posting date", "value date", "التاريخ"),
+    "amount": ("amount", "المبلغ"),
+    "debit": ("debit", "withdrawal", "مدين", "سحب"),
+    "credit": ("credit", "deposit", "دائن", "إيداع"),
+    "type": ("type", "النوع", "نوع المعاملة"),
+    "description": ("description", "details", "narrative", "memo", "الوصف", "البيان"),
+    "category": ("category", "الفئة"),
+    "payment_method": ("payment_method", "payment method", "طريقة الدفع"),
+}
+TYPE_ALIASES = {
+    "in": "IN", "credit": "IN", "cr": "IN", "وارد": "IN",
+    "out": "OUT", "debit": "OUT", "dr": "OUT", "منصرف": "OUT",
+}
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%Y/%m/%d")
+
+
+class StatementError(ValueError):
+    pass
+
+
+def _parse_date(value):
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    raise StatementError(f"تاريخ غير مفهوم: {value}")
+
+
+def _parse_amount(value):
+    """Statement amount text to signed piasters, parsed exactly from the digits."""
+    value = (value or "").strip().replace(",", "")
+    if not value:
+        return 0
+    try:
+        if value.startswith("(") and value.endswith(")"):
+            return -to_minor(value[1:-1])
+        return to_minor(value)
+    except ArithmeticError:
+        raise StatementError(f"مبلغ غير مفهوم: {value}")
+
+
+def _content_hash(account_id, date, trans_type, amount, description, occurrence, fitid=None):
+    key = f"fitid|{account_id}|{fitid}" if fitid else f"{account_id}|{date}|{trans_type}|{to_major(amount):.2f}|{description}|{occurrence}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class _Occurrences:
+    """Numbers identical rows within one statement so re-imports dedupe but genuine repeats are kept."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def next(self, key):
+        self.counts[key] = self.counts.get(key, 0) + 1
+        return self.counts[key]
+
+
+def _cell(record, columns, field):
+    index = columns.get(field)
+    return record[index] if index is not None and index < len(record) else ""
+
+
+def parse_csv(text_stream, account_id, category=DEFAULT_CATEGORY, payment_method=DEFAULT_PAYMENT_METHOD):
+    """Yield import rows from a CSV statement with a header row (English or Arabic column names)."""
+    reader = csv.reader(text_stream)
+    header = [name.strip().lower() for name in next(reader, [])]
+    columns = {}
+    for field, aliases in CSV_ALIASES.items():
+        for alias in aliases:
+            if alias in header:
+                columns[field] = header.index(alias)
+                break
+    if "date" not in columns or not ("amount" in columns or "debit" in columns or "credit" in columns):
+        raise StatementError("الملف يجب أن يحتوي على عمود للتاريخ وعمود للمبلغ.")
+
+    occurrences = _Occurrences()
+    for record in reader:
+        if not any(cell.strip() for cell in record):
+            continue
+        if "amount" in columns:
+            amount = _parse_amount(_cell(record, columns, "amount"))
+        else:
+            amount = _parse_amount(_cell(record, columns, "credit")) - _parse_amount(_cell(record, columns, "debit"))
+        trans_type = TYPE_ALIASES.get(_cell(record, columns, "type").strip().lower()) or ("IN" if amount >= 0 else "OUT")
+        amount = abs(amount)
+        date = _parse_date(_cell(record, columns, "date"))
+        description = _cell(record, columns, "description").strip()
+        key = (date, trans_type, amount, description)
+        yield (date, trans_type, amount, description, _cell(record, columns, "payment_method").strip() or payment_method,
+               _cell(record, columns, "category").strip() or category,
+               _content_hash(account_id, date, trans_type, amount, description, occurrences.next(key)))
+
+
+_OFX_TAG = re.compile(r"<(/?\w+)>([^<\r\n]*)")
+
+
+def _parse_ofx_date(value):
+    digits = re.match(r"\d{8}(\d{6})?", value.strip())
+    if not digits:
+        raise StatementError(f"تاريخ غير مفهوم: {value}")
+    stamp = digits.group(0)
+    return datetime.strptime(stamp, "%Y%m%d%H%M%S" if len(stamp) == 14 else "%Y%m%d").strftime("%Y-%m-%d %H:%M:%S")
+
+
+def parse_ofx(text_stream, account_id, category=DEFAULT_CATEGORY, payment_method=DEFAULT_PAYMENT_METHOD):
+    """Yield import rows from the <STMTTRN> blocks of an OFX/QFX statement (SGML or XML flavour)."""
+    occurrences = _Occurrences()
+    fields = None
+    for line in text_stream:
+        for tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                fields = {}
+            elif tag == "/STMTTRN" and fields is not None:
+                amount = _parse_amount(fields.get("TRNAMT"))
+                trans_type = "IN" if amount >= 0 else "OUT"
+                amount = abs(amount)
+                date = _parse_ofx_date(fields.get("DTPOSTED", ""))
+                description = " ".join(filter(None, (fields.get("NAME"), fields.get("MEMO"))))
+                key = (date, trans_type, amount, description)
+                yield (date, trans_type, amount, description, payment_method, category,
+                       _content_hash(account_id, date, trans_type, amount, description, occurrences.next(key), fields.get("FITID")))
+                fields = None
+            elif fields is not None and value.strip():
+                fields[tag] = value.strip()
+
+
+PARSERS = {"csv": parse_csv, "ofx": parse_ofx, "qfx": parse_ofx}
+
+
+def import_statement(fm, binary_stream, filename, account_id, progress=None, **defaults):
+    """Parse an uploaded statement and import it into ``account_id``; returns (inserted, skipped)."""
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension not in PARSERS:
+        raise StatementError("صيغة الملف غير مدعومة.")
+    text_stream = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", errors="replace", newline="")
+    rows = PARSERS[extension](text_stream, account_id, **defaults)
+    return fm.import_transactions(account_id, rows, progress=progress)
@@ -0,0 +1,230 @@
+"""SQL statement instrumentation, slow-query log and per-rerun timing breakdown.
+
+Set FINANCE_SQL_PROFILE=1 to open pool connections with a cursor factory
+that records, for every statement, its normalised SQL text, a fingerprint
+of the bound parameters (never the values themselves), the rows it
+returned or changed and its wall time including fetches. Statements slower
+than FINANCE_SLOW_QUERY_MS are logged to the ``finance.sql`` logger along
+with their EXPLAIN QUERY PLAN.
+
+Independently of that switch, ``start_run``/``span`` collect a timing
+breakdown (SQL, DataFrame building, Plotly, ...) for the current Streamlit
+rerun, which the admin panel shows to users listed in FINANCE_ADMINS.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+ENABLED = os.environ.get('FINANCE_SQL_PROFILE', '') == '1'
+SLOW_QUERY_MS = float(os.environ.get('FINANCE_SLOW_QUERY_MS', '100'))
+ADMINS = {name.strip() for name in os.environ.get('FINANCE_ADMINS', '').split(',') if name.strip()}
+
+logger = logging.getLogger('finance.sql')
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(params):
+    """Short stable hash of the parameter values, so identical calls can be grouped without logging data."""
+    return hashlib.sha1(repr(params).encode('utf-8')).hexdigest()[:12] if params else ''
+
+
+class QueryLog:
+    """Process-wide statement statistics, the most recent statements and the slow-query log."""
+
+    def __init__(self, recent=200, slow=100):
+        self._lock = threading.Lock()
+        self.stats = {}
+        self.recent = deque(maxlen=recent)
+        self.slow = deque(maxlen=slow)
+
+    def record(self, sql, params, rows, elapsed_ms, plan=None):
+        entry = {
+            'sql': sql, 'params': fingerprint(params), 'rows': rows,
+            'ms': round(elapsed_ms, 3), 'at': time.time(),
+        }
+        with self._lock:
+            stat = self.stats.setdefault(sql, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0})
+            stat['count'] += 1
+            stat['total_ms'] += elapsed_ms
+            stat['max_ms'] = max(stat['max_ms'], elapsed_ms)
+            stat['rows'] += rows
+            self.recent.append(entry)
+            if plan is not None:
+                self.slow.append(dict(entry, plan=plan))
+        run = current_run()
+        if run is not None:
+            run.sql_ms += elapsed_ms
+            run.sql_count += 1
+
+    def top(self, n=20):
+        with self._lock:
+            items = sorted(self.stats.items(), key=lambda item: item[1]['total_ms'], reverse=True)[:n]
+        return [dict(stat, sql=sql) for sql, stat in items]
+
+    def clear(self):
+        with self._lock:
+            self.stats.clear()
+            self.recent.clear()
+            self.slow.clear()
+
+
+query_log = QueryLog()
+
+
+class RunProfile:
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.sql_ms = 0.0
+        self.sql_count = 0
+        self.spans = {}
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def breakdown(self):
+        """(label, ms) rows: SQL, each named span, and whatever is left of the rerun."""
+        rows = [('SQL', self.sql_ms)] + list(self.spans.items())
+        accounted = sum(ms for _, ms in rows)
+        return rows + [('other (Streamlit, Python)', max(0.0, self.total_ms - accounted))]
+
+
+_local = threading.local()
+
+
+def start_run(page):
+    _local.run = RunProfile(page)
+    return _local.run
+
+
+def current_run():
+    return getattr(_local, 'run', None)
+
+
+@contextmanager
+def span(name):
+    """Attribute the wall time of the block to ``name`` in the current rerun's breakdown."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run = current_run()
+        if run is not None:
+            run.spans[name] = run.spans.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Times each statement from execute until its rows are exhausted, the cursor is reused or closed."""
+
+    _pending = None
+
+    def _start(self, sql, params):
+        self._finish()
+        self._pending = [normalize_sql(sql), params, 0, 0.0]
+
+    def _timed(self, call, *args):
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[3] += time.perf_counter() - started
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        sql, params, rows, elapsed = pending
+        if rows == 0 and self.rowcount > 0:
+            rows = self.rowcount
+        elapsed_ms = elapsed * 1000
+        plan = None
+        if elapsed_ms >= SLOW_QUERY_MS and sql.upper().startswith(('SELECT', 'WITH')):
+            try:
+                plan = [row[-1] for row in sqlite3.Cursor(self.connection).execute(f'EXPLAIN QUERY PLAN {sql}', params or ())]
+            except sqlite3.Error:
+                plan = []
+            logger.warning('slow query %.1f ms, %d rows, params %s: %s\n  plan: %s',
+                           elapsed_ms, rows, fingerprint(params), sql, ' | '.join(plan))
+        query_log.record(sql, params, rows, elapsed_ms, plan)
+
+    def execute(self, sql, params=()):
+        self._start(sql, params)
+        self._timed(super().execute, sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._start(sql, None)
+        self._timed(super().executemany, sql, seq_of_params)
+        self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._pending is not None:
+            self._pending[2] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._pending is not None:
+            self._pending[2] += len(rows)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._pending is not None:
+            self._pending[2] += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._pending is not None:
+            self._pending[2] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def connection_factory():
+    return InstrumentedConnection if ENABLED else sqlite3.Connection
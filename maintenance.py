@@ -0,0 +1,103 @@
+"""Maintenance commands for finance.db.
+
+Usage: python maintenance.py rebuild-rollups [--user USER]
+       python maintenance.py verify-balances [--user USER]
+       python maintenance.py shard-users [--user USER]
+"""
+import argparse
+import os
+import sys
+
+from finance_manager import DB_PATH, SHARD_DIR, FinanceManager, get_pool
+from migrations import rebuild_category_rollups, rebuild_monthly_rollups
+from money import format_money
+
+# Copied in this order by shard-users; rollups and the search index are rebuilt by the shard's triggers.
+SHARDED_TABLES = {
+    'accounts': 'user_id = :user',
+    'balance_checkpoints': 'account_id IN (SELECT id FROM source.accounts WHERE user_id = :user)',
+    'categories': 'user_id = :user',
+    'custom_categories': 'user_id = :user',
+    'budgets': 'user_id = :user',
+    'transactions': 'user_id = :user',
+    'transaction_categories': 'transaction_id IN (SELECT id FROM source.transactions WHERE user_id = :user)',
+    'alerts': 'user_id = :user',
+    'data_versions': 'user_id = :user',
+}
+
+
+def _users(args):
+    """The users to visit; with sharding on, every registered user (each lives in its own shard)."""
+    if args.user:
+        return [args.user]
+    with get_pool().connection() as conn:
+        if SHARD_DIR:
+            return [row[0] for row in conn.execute('SELECT username FROM users')]
+        return [row[0] for row in conn.execute('SELECT DISTINCT user_id FROM accounts')]
+
+
+def rebuild_rollups(args):
+    for user in _users(args) if SHARD_DIR else [args.user]:
+        with get_pool(user).connection() as conn, conn:
+            rebuild_monthly_rollups(conn, user)
+            rebuild_category_rollups(conn, user)
+    print(f"Rebuilt monthly and category rollups for {args.user or 'all users'}.")
+
+
+def verify_balances(args):
+    users = _users(args)
+    drifted = 0
+    for user in users:
+        for account_id, name, stored, expected in FinanceManager(user).verify_balances():
+            drifted += 1
+            print(f"{user}\t{account_id}\t{name}\tstored={format_money(stored)}\tledger={format_money(expected)}")
+    print(f"{drifted} drifted account(s).")
+    return 1 if drifted else 0
+
+
+def shard_users(args):
+    """Copy users' rows from the main database into their shards; re-running skips rows already copied."""
+    if not SHARD_DIR:
+        print("Set FINANCE_SHARD_DIR to the shard directory first.")
+        return 1
+    source = os.path.abspath(DB_PATH)
+    users = _users(args)
+    for user in users:
+        with get_pool(user).connection() as conn:
+            conn.execute('ATTACH DATABASE ? AS source', (source,))
+            try:
+                with conn:
+                    for table, where in SHARDED_TABLES.items():
+                        if table == 'alerts':
+                            # Copying accounts re-raised their low-balance alerts; keep the originals instead.
+                            conn.execute('DELETE FROM main.alerts WHERE user_id = :user', {'user': user})
+                        columns = ', '.join(row[1] for row in conn.execute(f'PRAGMA source.table_info({table})'))
+                        conn.execute(f'INSERT OR IGNORE INTO main.{table} ({columns}) '
+                                     f'SELECT {columns} FROM source.{table} WHERE {where}', {'user': user})
+            finally:
+                conn.execute('DETACH DATABASE source')
+    print(f"Copied {len(users)} user(s) into {SHARD_DIR}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = commands.add_parser('rebuild-rollups', help='recompute monthly_rollups and category_rollups from transactions')
+    rebuild.add_argument('--user', help='only rebuild this user_id')
+    rebuild.set_defaults(func=rebuild_rollups)
+
+    verify = commands.add_parser('verify-balances', help='compare stored balances with checkpoint + ledger delta')
+    verify.add_argument('--user', help='only check this user_id')
+    verify.set_defaults(func=verify_balances)
+
+    shard = commands.add_parser('shard-users', help='copy users from the main database into FINANCE_SHARD_DIR')
+    shard.add_argument('--user', help='only copy this user_id')
+    shard.set_defaults(func=shard_users)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
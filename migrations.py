@@ -0,0 +1,529 @@
+"""Versioned schema migrations, tracked in SQLite's ``PRAGMA user_version``."""
+import re
+from contextlib import contextmanager
+
+from text_search import fold_sql
+
+
+def _create_base_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            name TEXT,
+            balance REAL,
+            min_balance REAL,
+            created_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(username)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            date TEXT,
+            type TEXT,
+            amount REAL,
+            account_id INTEGER,
+            description TEXT,
+            payment_method TEXT,
+            category TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(username),
+            FOREIGN KEY (account_id) REFERENCES accounts(id)
+        )
+    ''')
+
+
+def _add_lookup_indexes(conn):
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_accounts_user ON accounts (user_id, id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions (user_id, date, id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_transactions_user_account_date ON transactions (user_id, account_id, date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_transactions_user_category ON transactions (user_id, category, date)')
+
+
+_ROLLUP_KEY = "{row}.user_id, substr({row}.date, 1, 7), COALESCE({row}.account_id, 0), COALESCE({row}.category, ''), {row}.type"
+
+_ROLLUP_ADD = '''
+            INSERT INTO monthly_rollups (user_id, month, account_id, category, type, total, count)
+            VALUES (''' + _ROLLUP_KEY + ''', {row}.amount, 1)
+            ON CONFLICT (user_id, month, account_id, category, type)
+            DO UPDATE SET total = total + excluded.total, count = count + 1;'''
+
+_ROLLUP_REMOVE = '''
+            UPDATE monthly_rollups SET total = total - {row}.amount, count = count - 1
+            WHERE (user_id, month, account_id, category, type) = (''' + _ROLLUP_KEY + ''');
+            DELETE FROM monthly_rollups
+            WHERE (user_id, month, account_id, category, type) = (''' + _ROLLUP_KEY + ''') AND count <= 0;'''
+
+
+def _add_monthly_rollups(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS monthly_rollups (
+            user_id TEXT NOT NULL,
+            month TEXT NOT NULL,
+            account_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            type TEXT NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, month, account_id, category, type)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_monthly_rollups_user_category ON monthly_rollups (user_id, category)')
+    # Triggers keep the rollup in the same transaction as the row change, whichever code path writes it.
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_insert AFTER INSERT ON transactions
+        BEGIN
+            {_ROLLUP_ADD.format(row='new')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_delete AFTER DELETE ON transactions
+        BEGIN
+            {_ROLLUP_REMOVE.format(row='old')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_update
+        AFTER UPDATE OF user_id, date, type, amount, account_id, category ON transactions
+        BEGIN
+            {_ROLLUP_REMOVE.format(row='old')}
+            {_ROLLUP_ADD.format(row='new')}
+        END
+    ''')
+    rebuild_monthly_rollups(conn)
+
+
+def rebuild_monthly_rollups(conn, user_id=None):
+    """Recompute monthly_rollups from the transactions table, for one user or everyone."""
+    where, params = ('WHERE user_id = ?', (user_id,)) if user_id is not None else ('', ())
+    conn.execute(f'DELETE FROM monthly_rollups {where}', params)
+    conn.execute(f'''
+        INSERT INTO monthly_rollups (user_id, month, account_id, category, type, total, count)
+        SELECT user_id, substr(date, 1, 7), COALESCE(account_id, 0), COALESCE(category, ''), type, SUM(amount), COUNT(*)
+        FROM transactions {where}
+        GROUP BY 1, 2, 3, 4, 5
+    ''', params)
+
+
+def _add_balance_ledger(conn):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(accounts)')}
+    if 'opening_balance' not in columns:
+        conn.execute('ALTER TABLE accounts ADD COLUMN opening_balance REAL NOT NULL DEFAULT 0')
+    if 'entries_since_checkpoint' not in columns:
+        conn.execute('ALTER TABLE accounts ADD COLUMN entries_since_checkpoint INTEGER NOT NULL DEFAULT 0')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS balance_checkpoints (
+            account_id INTEGER NOT NULL,
+            as_of_date TEXT NOT NULL,
+            as_of_id INTEGER NOT NULL,
+            balance REAL NOT NULL,
+            PRIMARY KEY (account_id, as_of_date, as_of_id)
+        ) WITHOUT ROWID
+    ''')
+    # Treat the stored balance as authoritative and derive the opening balance the ledger starts from.
+    conn.execute('''
+        UPDATE accounts SET opening_balance = COALESCE(balance, 0) - COALESCE((
+            SELECT SUM(CASE WHEN t.type = 'IN' THEN t.amount ELSE -t.amount END)
+            FROM transactions t WHERE t.user_id = accounts.user_id AND t.account_id = accounts.id
+        ), 0)
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO balance_checkpoints (account_id, as_of_date, as_of_id, balance)
+        SELECT a.id, t.date, t.id, COALESCE(a.balance, 0)
+        FROM accounts a JOIN transactions t ON t.id = (
+            SELECT id FROM transactions WHERE user_id = a.user_id AND account_id = a.id ORDER BY date DESC, id DESC LIMIT 1
+        )
+    ''')
+
+
+_FTS_COLUMNS = 'user_id, description, category, payment_method'
+
+
+def _fts_values(row):
+    return f"{row}.id, {row}.user_id, {fold_sql(row + '.description')}, {fold_sql(row + '.category')}, {fold_sql(row + '.payment_method')}"
+
+
+def _add_transactions_fts(conn):
+    # Contentless: the folded text only lives in the index, deletes replay the folded old values.
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+            {_FTS_COLUMNS}, content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    insert = f'INSERT INTO transactions_fts (rowid, {_FTS_COLUMNS}) VALUES ({_fts_values("new")});'
+    delete = f"INSERT INTO transactions_fts (transactions_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', {_fts_values('old')});"
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_insert AFTER INSERT ON transactions BEGIN {insert} END')
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete AFTER DELETE ON transactions BEGIN {delete} END')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_update
+        AFTER UPDATE OF {_FTS_COLUMNS} ON transactions
+        BEGIN {delete} {insert} END
+    ''')
+    conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('delete-all')")
+    conn.execute(f'INSERT INTO transactions_fts (rowid, {_FTS_COLUMNS}) SELECT {_fts_values("transactions")} FROM transactions')
+
+
+def _add_import_hash(conn):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(transactions)')}
+    if 'import_hash' not in columns:
+        conn.execute('ALTER TABLE transactions ADD COLUMN import_hash TEXT')
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_import_hash
+        ON transactions (user_id, import_hash) WHERE import_hash IS NOT NULL
+    ''')
+
+
+def _add_custom_categories_and_data_versions(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS custom_categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            account_id INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            name TEXT NOT NULL,
+            UNIQUE (user_id, account_id, type, name),
+            FOREIGN KEY (user_id) REFERENCES users(username),
+            FOREIGN KEY (account_id) REFERENCES accounts(id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            user_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+
+def _add_app_settings(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS app_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    # Signs the session tokens that let a reload skip the password check.
+    conn.execute("INSERT OR IGNORE INTO app_settings (key, value) VALUES ('session_secret', lower(hex(randomblob(32))))")
+
+
+def _add_budgets(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS budgets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            account_id INTEGER,
+            category TEXT NOT NULL,
+            amount REAL NOT NULL,
+            period TEXT NOT NULL DEFAULT 'month' CHECK (period IN ('month', 'week')),
+            created_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(username),
+            FOREIGN KEY (account_id) REFERENCES accounts(id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_budgets_user ON budgets (user_id, id)')
+
+
+def _add_alerts(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('low_balance', 'budget')),
+            account_id INTEGER,
+            budget_id INTEGER,
+            period_start TEXT,
+            amount REAL,
+            threshold REAL,
+            created_at TEXT NOT NULL,
+            read_at TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_alerts_user ON alerts (user_id, id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_alerts_user_unread ON alerts (user_id, id) WHERE read_at IS NULL')
+    # One overrun alert per budget and period, however many writes push it further over.
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_alerts_budget_period ON alerts (budget_id, period_start) WHERE kind = 'budget'")
+    # Low balance is raised when an account crosses below its minimum, whichever code path moved it.
+    low_balance = '''
+        INSERT INTO alerts (user_id, kind, account_id, amount, threshold, created_at)
+        VALUES (new.user_id, 'low_balance', new.id, new.balance, new.min_balance, datetime('now', 'localtime'));
+    '''
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_accounts_low_balance_insert AFTER INSERT ON accounts
+        WHEN new.balance < new.min_balance
+        BEGIN {low_balance} END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_accounts_low_balance_update AFTER UPDATE OF balance, min_balance ON accounts
+        WHEN new.balance < new.min_balance AND NOT (old.balance < old.min_balance)
+        BEGIN {low_balance} END
+    ''')
+    conn.execute('''
+        INSERT INTO alerts (user_id, kind, account_id, amount, threshold, created_at)
+        SELECT user_id, 'low_balance', id, balance, min_balance, datetime('now', 'localtime')
+        FROM accounts WHERE balance < min_balance
+    ''')
+
+
+def _rebuild_with_integer_money(conn, table):
+    """Recreate ``table`` with every REAL column as INTEGER piasters, keeping rows, ids, indexes and triggers."""
+    money = [row[1] for row in conn.execute(f'PRAGMA table_info({table})') if row[2].upper() == 'REAL']
+    if not money:
+        return
+    ddl = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+    dependents = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL", (table,))]
+    sequence = conn.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone() \
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone() else None
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+    converted = ', '.join(f'CAST(ROUND({col} * 100) AS INTEGER)' if col in money else col for col in columns)
+
+    ddl = re.sub(r'\bREAL\b', 'INTEGER', ddl, flags=re.IGNORECASE)
+    conn.execute(re.sub(rf'^CREATE TABLE\s+"?{table}"?', f'CREATE TABLE {table}_new', ddl, flags=re.IGNORECASE))
+    conn.execute(f'INSERT INTO {table}_new ({", ".join(columns)}) SELECT {converted} FROM {table}')
+    conn.execute(f'DROP TABLE {table}')
+    conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+    for sql in dependents:
+        conn.execute(sql)
+    if sequence:
+        conn.execute('UPDATE sqlite_sequence SET seq = ? WHERE name = ?', (sequence[0], table))
+
+
+def _store_money_as_minor_units(conn):
+    # Other tables' triggers name tables that are briefly missing while each one is rebuilt.
+    conn.execute('PRAGMA legacy_alter_table = ON')
+    try:
+        for table in ('accounts', 'transactions', 'monthly_rollups', 'balance_checkpoints', 'budgets', 'alerts'):
+            _rebuild_with_integer_money(conn, table)
+    finally:
+        conn.execute('PRAGMA legacy_alter_table = OFF')
+
+
+def _add_typed_timestamps(conn):
+    # Virtual generated columns: derived from the date text on every write path, stored only in the indexes.
+    conn.execute('''
+        ALTER TABLE transactions ADD COLUMN ts INTEGER
+        GENERATED ALWAYS AS (CAST(strftime('%s', date) AS INTEGER)) VIRTUAL
+    ''')
+    conn.execute('''
+        ALTER TABLE transactions ADD COLUMN month_key INTEGER
+        GENERATED ALWAYS AS (CAST(substr(date, 1, 4) AS INTEGER) * 100 + CAST(substr(date, 6, 2) AS INTEGER)) VIRTUAL
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_transactions_user_ts ON transactions (user_id, ts, id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_transactions_user_month ON transactions (user_id, month_key)')
+    # Range scans and keyset paging now go through ts.
+    conn.execute('DROP INDEX IF EXISTS idx_transactions_user_date')
+
+
+_CATEGORY_ROLLUP_KEY = '(user_id, month, account_id, category_id, type)'
+
+_CATEGORY_ROLLUP_UPSERT = '''
+    ON CONFLICT (user_id, month, account_id, category_id, type)
+    DO UPDATE SET total = total + excluded.total, count = count + excluded.count'''
+
+_CATEGORY_TRIGGERS = (
+    'trg_transaction_categories_insert', 'trg_transaction_categories_delete',
+    'trg_transactions_unlink_categories', 'trg_transactions_category_rollup_update',
+)
+
+
+def _add_normalized_categories(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            UNIQUE (user_id, name),
+            FOREIGN KEY (user_id) REFERENCES users(username)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS transaction_categories (
+            transaction_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            PRIMARY KEY (transaction_id, category_id),
+            FOREIGN KEY (transaction_id) REFERENCES transactions(id),
+            FOREIGN KEY (category_id) REFERENCES categories(id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_transaction_categories_category ON transaction_categories (category_id, transaction_id)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS category_rollups (
+            user_id TEXT NOT NULL,
+            month TEXT NOT NULL,
+            account_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, month, account_id, category_id, type)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_category_rollups_user_category ON category_rollups (user_id, category_id, month)')
+    if 'category_id' not in [row[1] for row in conn.execute('PRAGMA table_info(custom_categories)')]:
+        conn.execute('ALTER TABLE custom_categories ADD COLUMN category_id INTEGER REFERENCES categories(id)')
+
+    for name in _CATEGORY_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+    rebuild_transaction_categories(conn)
+
+    # A link counts its transaction once towards its category; the transaction row must still exist.
+    link_key = f'''{_CATEGORY_ROLLUP_KEY} = (
+        SELECT user_id, substr(date, 1, 7), COALESCE(account_id, 0), old.category_id, type FROM transactions WHERE id = old.transaction_id)'''
+    conn.execute(f'''
+        CREATE TRIGGER trg_transaction_categories_insert AFTER INSERT ON transaction_categories
+        BEGIN
+            INSERT INTO category_rollups (user_id, month, account_id, category_id, type, total, count)
+            SELECT user_id, substr(date, 1, 7), COALESCE(account_id, 0), new.category_id, type, amount, 1
+            FROM transactions WHERE id = new.transaction_id {_CATEGORY_ROLLUP_UPSERT};
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER trg_transaction_categories_delete AFTER DELETE ON transaction_categories
+        BEGIN
+            UPDATE category_rollups SET total = total - (SELECT amount FROM transactions WHERE id = old.transaction_id),
+                count = count - 1
+            WHERE {link_key};
+            DELETE FROM category_rollups WHERE {link_key} AND count <= 0;
+        END
+    ''')
+    # BEFORE so the delete trigger above can still read the transaction.
+    conn.execute('''
+        CREATE TRIGGER trg_transactions_unlink_categories BEFORE DELETE ON transactions
+        BEGIN
+            DELETE FROM transaction_categories WHERE transaction_id = old.id;
+        END
+    ''')
+    old_key = '''(user_id, month, account_id, type) = (old.user_id, substr(old.date, 1, 7), COALESCE(old.account_id, 0), old.type)
+                AND category_id IN (SELECT category_id FROM transaction_categories WHERE transaction_id = old.id)'''
+    conn.execute(f'''
+        CREATE TRIGGER trg_transactions_category_rollup_update
+        AFTER UPDATE OF user_id, date, type, amount, account_id ON transactions
+        BEGIN
+            UPDATE category_rollups SET total = total - old.amount, count = count - 1 WHERE {old_key};
+            DELETE FROM category_rollups WHERE {old_key} AND count <= 0;
+            INSERT INTO category_rollups (user_id, month, account_id, category_id, type, total, count)
+            SELECT new.user_id, substr(new.date, 1, 7), COALESCE(new.account_id, 0), category_id, new.type, new.amount, 1
+            FROM transaction_categories WHERE transaction_id = new.id {_CATEGORY_ROLLUP_UPSERT};
+        END
+    ''')
+
+
+def rebuild_transaction_categories(conn):
+    """Re-derive categories and transaction links from the comma-separated category text, then the category rollups."""
+    conn.execute('DELETE FROM transaction_categories')
+    conn.execute('DROP TABLE IF EXISTS temp.category_split')
+    conn.execute('''
+        CREATE TEMP TABLE category_split AS
+        WITH RECURSIVE split (id, user_id, name, rest) AS (
+            SELECT id, user_id, '', category || ',' FROM transactions WHERE category IS NOT NULL
+            UNION ALL
+            SELECT id, user_id, trim(substr(rest, 1, instr(rest, ',') - 1)), substr(rest, instr(rest, ',') + 1)
+            FROM split WHERE rest != ''
+        )
+        SELECT DISTINCT id, user_id, name FROM split WHERE name != ''
+    ''')
+    conn.execute('''
+        INSERT OR IGNORE INTO categories (user_id, name)
+        SELECT DISTINCT user_id, name FROM temp.category_split
+        UNION SELECT user_id, name FROM custom_categories
+    ''')
+    conn.execute('''
+        INSERT OR IGNORE INTO transaction_categories (transaction_id, category_id)
+        SELECT s.id, c.id FROM temp.category_split s JOIN categories c ON c.user_id = s.user_id AND c.name = s.name
+    ''')
+    conn.execute('DROP TABLE temp.category_split')
+    conn.execute('''
+        UPDATE custom_categories SET category_id = (
+            SELECT id FROM categories c WHERE c.user_id = custom_categories.user_id AND c.name = custom_categories.name)
+    ''')
+    rebuild_category_rollups(conn)
+
+
+def rebuild_category_rollups(conn, user_id=None):
+    """Recompute category_rollups from the transaction links, for one user or everyone."""
+    where, params = ('WHERE user_id = ?', (user_id,)) if user_id is not None else ('', ())
+    conn.execute(f'DELETE FROM category_rollups {where}', params)
+    where = where.replace('user_id', 't.user_id')
+    conn.execute(f'''
+        INSERT INTO category_rollups (user_id, month, account_id, category_id, type, total, count)
+        SELECT t.user_id, substr(t.date, 1, 7), COALESCE(t.account_id, 0), tc.category_id, t.type, SUM(t.amount), COUNT(*)
+        FROM transaction_categories tc JOIN transactions t ON t.id = tc.transaction_id {where}
+        GROUP BY 1, 2, 3, 4, 5
+    ''', params)
+
+
+def _add_rewrite_counter(conn):
+    # Bumped only by writes that change or remove existing transactions (see frame_cache).
+    conn.execute('ALTER TABLE data_versions ADD COLUMN rewrites INTEGER NOT NULL DEFAULT 0')
+
+
+# Append new steps at the end; a step's number must never change once released.
+MIGRATIONS = [
+    (1, _create_base_tables),
+    (2, _add_lookup_indexes),
+    (3, _add_monthly_rollups),
+    (4, _add_balance_ledger),
+    (5, _add_transactions_fts),
+    (6, _add_import_hash),
+    (7, _add_custom_categories_and_data_versions),
+    (8, _add_app_settings),
+    (9, _add_budgets),
+    (10, _add_alerts),
+    (11, _store_money_as_minor_units),
+    (12, _add_typed_timestamps),
+    (13, _add_normalized_categories),
+    (14, _add_rewrite_counter),
+]
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every pending migration, each one in its own write transaction."""
+    for version, step in MIGRATIONS:
+        if version <= schema_version(conn):
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another process may have migrated while we waited for the lock.
+            if version > schema_version(conn):
+                step(conn)
+                conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    conn.execute('PRAGMA optimize')
+    return schema_version(conn)
+
+
+# Steps that own row-level triggers on transactions; re-running one recreates its triggers and backfills.
+_TRIGGER_STEPS = (_add_monthly_rollups, _add_transactions_fts, _add_normalized_categories)
+
+
+@contextmanager
+def bulk_load(conn):
+    """Drop the per-row transactions triggers while loading, then rebuild what they maintain in one pass.
+
+    Use only for offline loads (e.g. synthetic data); concurrent writers would miss their triggers.
+    """
+    triggers = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'transactions'")]
+    with conn:
+        for name in triggers:
+            conn.execute(f'DROP TRIGGER {name}')
+    try:
+        yield conn
+    finally:
+        with conn:
+            for step in _TRIGGER_STEPS:
+                step(conn)
+
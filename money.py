@@ -0,0 +1,29 @@
+"""Money is stored, summed and passed around as integer minor units (piasters, 1/100 of a pound).
+
+Only the edges convert: ``to_minor`` for amounts typed or parsed in pounds,
+``to_major``/``format_money`` for display, ``major_series`` for charts.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+MINOR_PER_MAJOR = 100
+
+
+def to_minor(value):
+    """Pounds (int, float, str or Decimal) to whole piasters, rounding half away from zero."""
+    if value is None or value == "":
+        return 0
+    return int((Decimal(str(value)) * MINOR_PER_MAJOR).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_major(minor):
+    """Exact pounds as a Decimal."""
+    return Decimal(int(minor or 0)).scaleb(-2)
+
+
+def format_money(minor):
+    return f"{to_major(minor):,.2f}"
+
+
+def major_series(series):
+    """int64 piaster column to float pounds, for charts and tables only."""
+    return series / MINOR_PER_MAJOR
@@ -0,0 +1,61 @@
+import streamlit as st
+from auth import SESSION_DAYS, HashBusy
+from finance_manager import FinanceManager
+
+if st.session_state.logged_in:
+    st.success("مرحبًا بك في FloosAfandy!")
+    st.write("يمكنك الآن إدارة حساباتك ومعاملاتك.")
+    st.page_link("pages/transactions.py", label="الذهاب إلى المعاملات", icon="💳")
+    if st.button("🚪 تسجيل الخروج"):
+        st.session_state.user_id = None
+        st.session_state.logged_in = False
+        st.session_state.pending_cookie = ("", 0)
+        st.rerun()
+else:
+    st.title("مرحبًا بك في FloosAfandy")
+    st.markdown(
+        f'<div style="display: flex; justify-content: center; margin: 20px 0;">'
+        f'<img src="https://i.ibb.co/KpzDy27r/IMG-2998.png" width="300">'
+        f'</div>',
+        unsafe_allow_html=True
+    )
+    tab1, tab2 = st.tabs(["🔑 تسجيل الدخول", "🆕 إنشاء حساب جديد"])
+
+    fm = FinanceManager()
+
+    with tab1:  # Login
+        st.subheader("تسجيل الدخول إلى حسابك")
+        login_username = st.text_input("اسم المستخدم", key="login_username")
+        login_password = st.text_input("كلمة المرور", type="password", key="login_password")
+        if st.button("تسجيل الدخول"):
+            try:
+                verified = fm.verify_user(login_username, login_password)
+            except HashBusy:
+                st.warning("الخادم مشغول حالياً، حاول مرة أخرى بعد لحظات.")
+            else:
+                if verified:
+                    st.session_state.user_id = login_username
+                    st.session_state.logged_in = True
+                    st.session_state.pending_cookie = (fm.issue_session_token(login_username), SESSION_DAYS * 86400)
+                    st.rerun()  # Registers the private pages for this session
+                else:
+                    st.error("اسم المستخدم أو كلمة المرور غير صحيحة!")
+
+    with tab2:  # Register
+        st.subheader("إنشاء حساب جديد")
+        new_username = st.text_input("اسم المستخدم", key="new_username")
+        new_password = st.text_input("كلمة المرور", type="password", key="new_password")
+        confirm_password = st.text_input("تأكيد كلمة المرور", type="password", key="confirm_password")
+        if st.button("إنشاء الحساب"):
+            if new_password == confirm_password:
+                try:
+                    added = fm.add_user(new_username, new_password)
+                except HashBusy:
+                    st.warning("الخادم مشغول حالياً، حاول مرة أخرى بعد لحظات.")
+                else:
+                    if added:
+                        st.success(f"تم إنشاء الحساب بنجاح! يمكنك الآن تسجيل الدخول باستخدام {new_username}.")
+                    else:
+                        st.error("اسم المستخدم موجود بالفعل!")
+            else:
+                st.error("كلمات المرور غير متطابقة!")
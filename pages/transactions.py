@@ -1,197 +1,197 @@
 import streamlit as st
-import pandas as pd
 from finance_manager import FinanceManager
-from mobile_styles import apply_mobile_styles
+from importer import StatementError, import_statement
+from money import format_money, major_series, to_minor
 from datetime import datetime
 
-# Set page configuration
-st.set_page_config(page_title="FloosAfandy - المعاملات", layout="wide", initial_sidebar_state="collapsed")
-
-# Initialize session state
-if "user_id" not in st.session_state:
-    st.session_state.user_id = None
-if "logged_in" not in st.session_state:
-    st.session_state.logged_in = False
 if "active_tab" not in st.session_state:
     st.session_state.active_tab = "إضافة معاملة"  # Default value
 
-apply_mobile_styles()
-
-# Horizontal navigation bar
-col1, col2, col3, col4, col5, col6, col7 = st.columns(7)
-with col1:
-    if st.button("🏠 الرئيسية", key="nav_home"):
-        st.session_state.current_page = "home"
-        st.experimental_rerun()
-with col2:
-    if st.button("📊 لوحة التحكم", key="nav_dashboard"):
-        st.session_state.current_page = "dashboard"
-        st.experimental_rerun()
-with col3:
-    if st.button("💳 المعاملات", key="nav_transactions"):
-        st.session_state.current_page = "transactions"
-        st.experimental_rerun()
-with col4:
-    if st.button("🏦 الحسابات", key="nav_accounts"):
-        st.session_state.current_page = "accounts"
-        st.experimental_rerun()
-with col5:
-    if st.button("💰 الميزانيات", key="nav_budgets"):
-        st.session_state.current_page = "budgets"
-        st.experimental_rerun()
-with col6:
-    if st.button("📈 التقارير", key="nav_reports"):
-        st.session_state.current_page = "reports"
-        st.experimental_rerun()
-with col7:
-    if st.button("📚 التعليمات", key="nav_instructions"):
-        st.session_state.current_page = "instructions"
-        st.experimental_rerun()
-
-# Check if user is logged in
-if not st.session_state.logged_in:
-    st.error("يرجى تسجيل الدخول أولاً من الصفحة الرئيسية!")
-    st.session_state.current_page = "home"
-    st.experimental_rerun()
+fm = FinanceManager(st.session_state.user_id)
+
+# Page Title and Description
+st.title("💳 إدارة المعاملات")
+st.markdown("<p style='color: #6b7280;'>قم بإدارة وتتبع جميع معاملاتك المالية بسهولة من خلال هذه الصفحة.</p>", unsafe_allow_html=True)
+st.markdown("---")
+
+# Summary Section
+st.subheader("📊 ملخص المعاملات")
+summary = fm.get_summary()
+if summary["count"]:
+    total_income = summary["income"]
+    total_expenses = summary["expenses"]
+    net_balance = summary["net"]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("📥 إجمالي الوارد", f"{format_money(total_income)} جنيه")
+    with col2:
+        st.metric("📤 إجمالي المصروفات", f"{format_money(total_expenses)} جنيه")
+    with col3:
+        st.metric("📊 صافي الرصيد", f"{format_money(net_balance)} جنيه")
 else:
-    fm = FinanceManager(st.session_state.user_id)
+    st.info("ℹ️ لا توجد معاملات مسجلة حتى الآن.")
+
+st.markdown("---")
+
+# Tabs for Categories, Adding Transactions, and Viewing Transactions
+tab_names = ["📂 إدارة الفئات", "➕ إضافة معاملة", "📋 عرض المعاملات", "📥 استيراد كشف حساب"]
+tab1, tab2, tab3, tab4 = st.tabs(tab_names)
+
+accounts = fm.get_all_accounts()
+account_options = {acc[0]: acc[2] for acc in accounts}
 
-    # Page Title and Description
-    st.title("💳 إدارة المعاملات")
-    st.markdown("<p style='color: #6b7280;'>قم بإدارة وتتبع جميع معاملاتك المالية بسهولة من خلال هذه الصفحة.</p>", unsafe_allow_html=True)
+# Tab 1: Manage Categories
+with tab1:
+    st.subheader("📂 إدارة الفئات")
+    st.markdown("<p style='color: #6b7280;'>قم بإضافة أو حذف الفئات المخصصة لمعاملاتك.</p>", unsafe_allow_html=True)
     st.markdown("---")
 
-    # Summary Section
-    st.subheader("📊 ملخص المعاملات")
-    transactions = fm.get_all_transactions()
-    if transactions:
-        df = pd.DataFrame(transactions, columns=["id", "user_id", "date", "type", "amount", "account_id", "description", "payment_method", "category"])
-        df["type"] = df["type"].replace({"IN": "وارد", "OUT": "منصرف"})
-        total_income = df[df["type"] == "وارد"]["amount"].sum()
-        total_expenses = df[df["type"] == "منصرف"]["amount"].sum()
-        net_balance = total_income - total_expenses
-
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("📥 إجمالي الوارد", f"{total_income:,.2f} جنيه")
-        with col2:
-            st.metric("📤 إجمالي المصروفات", f"{total_expenses:,.2f} جنيه")
-        with col3:
-            st.metric("📊 صافي الرصيد", f"{net_balance:,.2f} جنيه")
+    cat_account_id = st.selectbox("🏦 اختر الحساب", options=list(account_options.keys()), format_func=lambda x: account_options[x], key="cat_account")
+    cat_trans_type = st.selectbox("📋 نوع المعاملة", ["وارد", "منصرف"], key="cat_type")
+    cat_trans_type_db = "IN" if cat_trans_type == "وارد" else "OUT"
+    new_category_name = st.text_input("📛 اسم الفئة الجديدة", placeholder="مثال: مكافأة", key="new_category_name")
+
+    if st.button("➕ إضافة فئة", key="add_category_button"):
+        if new_category_name.strip():
+            with st.spinner("جارٍ الإضافة..."):
+                try:
+                    fm.add_custom_category(cat_account_id, cat_trans_type_db, new_category_name)
+                    st.success(f"✅ تمت إضافة الفئة: {new_category_name}")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ خطأ: {str(e)}")
+        else:
+            st.warning("⚠️ أدخل اسمًا للفئة!")
+
+    categories = fm.get_custom_categories(cat_account_id, cat_trans_type_db)
+    if categories:
+        st.write("📋 الفئات الحالية:")
+        for cat_name, cat_id in categories:
+            col1, col2 = st.columns([3, 1])
+            col1.write(f"{'📥' if cat_trans_type_db == 'IN' else '📤'} {cat_name}")
+            if col2.button("🗑️ حذف", key=f"del_cat_{cat_id}_{cat_account_id}_{cat_trans_type_db}"):
+                with st.spinner("جارٍ الحذف..."):
+                    try:
+                        fm.delete_custom_category(cat_account_id, cat_trans_type_db, cat_id)
+                        st.success(f"🗑️ تم حذف الفئة: {cat_name}")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ خطأ: {str(e)}")
     else:
-        st.info("ℹ️ لا توجد معاملات مسجلة حتى الآن.")
+        st.info("ℹ️ لا توجد فئات.")
 
+# Tab 2: Add Transactions
+with tab2:
+    st.subheader("➕ إضافة معاملة جديدة")
+    st.markdown("<p style='color: #6b7280;'>قم بإضافة معاملة جديدة إلى حساباتك.</p>", unsafe_allow_html=True)
     st.markdown("---")
 
-    # Tabs for Categories, Adding Transactions, and Viewing Transactions
-    tab_names = ["📂 إدارة الفئات", "➕ إضافة معاملة", "📋 عرض المعاملات"]
-    tab1, tab2, tab3 = st.tabs(tab_names)
-
-    accounts = fm.get_all_accounts()
-    account_options = {acc[0]: acc[2] for acc in accounts}
+    if accounts:
+        st.session_state.account_id = st.selectbox("🏦 الحساب", options=list(account_options.keys()), format_func=lambda x: account_options[x], key="add_account")
+        st.session_state.trans_type = st.selectbox("📋 نوع المعاملة", ["وارد", "منصرف"], key="add_type")
+        trans_type_db = "IN" if st.session_state.trans_type == "وارد" else "OUT"
 
-    # Tab 1: Manage Categories
-    with tab1:
-        st.subheader("📂 إدارة الفئات")
-        st.markdown("<p style='color: #6b7280;'>قم بإضافة أو حذف الفئات المخصصة لمعاملاتك.</p>", unsafe_allow_html=True)
-        st.markdown("---")
+        categories = fm.get_custom_categories(st.session_state.account_id, trans_type_db)
+        category_options = [cat[0] for cat in categories] if categories else ["غير مصنف"]
 
-        cat_account_id = st.selectbox("🏦 اختر الحساب", options=list(account_options.keys()), format_func=lambda x: account_options[x], key="cat_account")
-        cat_trans_type = st.selectbox("📋 نوع المعاملة", ["وارد", "منصرف"], key="cat_type")
-        cat_trans_type_db = "IN" if cat_trans_type == "وارد" else "OUT"
-        new_category_name = st.text_input("📛 اسم الفئة الجديدة", placeholder="مثال: مكافأة", key="new_category_name")
+        selected_category = st.selectbox("📂 الفئة", options=category_options, key="add_category")
+        amount = st.number_input("💵 المبلغ", min_value=0.01, value=0.01, step=0.01, format="%.2f", key="add_amount")
+        payment_method = st.selectbox("💳 طريقة الدفع", ["كاش", "بطاقة ائتمان", "تحويل بنكي"], key="add_payment")
+        description = st.text_area("📝 الوصف", placeholder="وصف المعاملة (اختياري)", key="add_desc")
 
-        if st.button("➕ إضافة فئة", key="add_category_button"):
-            if new_category_name.strip():
-                with st.spinner("جارٍ الإضافة..."):
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("💾 حفظ المعاملة"):
+                with st.spinner("جارٍ الحفظ..."):
                     try:
-                        fm.add_custom_category(cat_account_id, cat_trans_type_db, new_category_name)
-                        st.success(f"✅ تمت إضافة الفئة: {new_category_name}")
-                        st.experimental_rerun()
+                        fm.add_transaction(st.session_state.account_id, to_minor(amount), trans_type_db, description, payment_method, selected_category)
+                        st.success("✅ تم حفظ المعاملة بنجاح!")
+                        st.rerun()
                     except Exception as e:
                         st.error(f"❌ خطأ: {str(e)}")
-            else:
-                st.warning("⚠️ أدخل اسمًا للفئة!")
-
-        categories = fm.get_custom_categories(cat_account_id, cat_trans_type_db)
-        if categories:
-            st.write("📋 الفئات الحالية:")
-            for cat in categories:
-                cat_name = cat[0]
-                col1, col2 = st.columns([3, 1])
-                col1.write(f"{'📥' if cat_trans_type_db == 'IN' else '📤'} {cat_name}")
-                if col2.button("🗑️ حذف", key=f"del_cat_{cat_name}_{cat_account_id}_{cat_trans_type_db}"):
-                    with st.spinner("جارٍ الحذف..."):
-                        try:
-                            fm.delete_custom_category_by_name(cat_account_id, cat_trans_type_db, cat_name)
-                            st.success(f"🗑️ تم حذف الفئة: {cat_name}")
-                            st.experimental_rerun()
-                        except Exception as e:
-                            st.error(f"❌ خطأ: {str(e)}")
-        else:
-            st.info("ℹ️ لا توجد فئات.")
-
-    # Tab 2: Add Transactions
-    with tab2:
-        st.subheader("➕ إضافة معاملة جديدة")
-        st.markdown("<p style='color: #6b7280;'>قم بإضافة معاملة جديدة إلى حساباتك.</p>", unsafe_allow_html=True)
-        st.markdown("---")
-
-        if accounts:
-            st.session_state.account_id = st.selectbox("🏦 الحساب", options=list(account_options.keys()), format_func=lambda x: account_options[x], key="add_account")
-            st.session_state.trans_type = st.selectbox("📋 نوع المعاملة", ["وارد", "منصرف"], key="add_type")
-            trans_type_db = "IN" if st.session_state.trans_type == "وارد" else "OUT"
-
-            categories = fm.get_custom_categories(st.session_state.account_id, trans_type_db)
-            category_options = [cat[0] for cat in categories] if categories else ["غير مصنف"]
-
-            selected_category = st.selectbox("📂 الفئة", options=category_options, key="add_category")
-            amount = st.number_input("💵 المبلغ", min_value=0.01, value=0.01, step=0.01, format="%.2f", key="add_amount")
-            payment_method = st.selectbox("💳 طريقة الدفع", ["كاش", "بطاقة ائتمان", "تحويل بنكي"], key="add_payment")
-            description = st.text_area("📝 الوصف", placeholder="وصف المعاملة (اختياري)", key="add_desc")
-
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("💾 حفظ المعاملة"):
-                    with st.spinner("جارٍ الحفظ..."):
-                        try:
-                            fm.add_transaction(st.session_state.account_id, amount, trans_type_db, description, payment_method, selected_category)
-                            st.success("✅ تم حفظ المعاملة بنجاح!")
-                            st.experimental_rerun()
-                        except Exception as e:
-                            st.error(f"❌ خطأ: {str(e)}")
-            with col2:
-                if st.button("🧹 مسح الحقول"):
-                    st.session_state.pop("add_amount", None)
-                    st.session_state.pop("add_desc", None)
-                    st.experimental_rerun()
-        else:
-            st.warning("⚠️ لا توجد حسابات مضافة. يرجى إضافة حساب أولاً.")
-
-    # Tab 3: View Transactions
-    with tab3:
-        st.subheader("📋 عرض المعاملات")
-        st.markdown("<p style='color: #6b7280;'>قم بمراجعة وتصفية معاملاتك المالية.</p>", unsafe_allow_html=True)
-        st.markdown("---")
-
-        if transactions:
-            df["account"] = df["account_id"].map(account_options)
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                search_query = st.text_input("🔍 البحث", "")
-            with col2:
-                filter_type = st.selectbox("📋 نوع المعاملة", ["الكل", "وارد", "منصرف"], key="filter_type")
-            with col3:
-                filter_category = st.selectbox("📂 الفئة", ["الكل"] + list(df["category"].unique()), key="filter_category")
-
-            filtered_df = df
-            if search_query:
-                filtered_df = filtered_df[filtered_df.apply(lambda row: search_query.lower() in str(row).lower(), axis=1)]
-            if filter_type != "الكل":
-                filtered_df = filtered_df[filtered_df["type"] == filter_type]
-            if filter_category != "الكل":
-                filtered_df = filtered_df[filtered_df["category"] == filter_category]
-
-            st.dataframe(filtered_df[["date", "type", "amount", "account", "category", "description"]], use_container_width=True)
-        else:
-            st.info("ℹ️ لا توجد معاملات مسجلة.")
+        with col2:
+            if st.button("🧹 مسح الحقول"):
+                st.session_state.pop("add_amount", None)
+                st.session_state.pop("add_desc", None)
+                st.rerun()
+    else:
+        st.warning("⚠️ لا توجد حسابات مضافة. يرجى إضافة حساب أولاً.")
+
+# Tab 3: View Transactions
+with tab3:
+    st.subheader("📋 عرض المعاملات")
+    st.markdown("<p style='color: #6b7280;'>قم بمراجعة وتصفية معاملاتك المالية.</p>", unsafe_allow_html=True)
+    st.markdown("---")
+
+    if summary["count"]:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            search_query = st.text_input("🔍 البحث", "")
+        with col2:
+            filter_type = st.selectbox("📋 نوع المعاملة", ["الكل", "وارد", "منصرف"], key="filter_type")
+        with col3:
+            filter_category = st.selectbox("📂 الفئة", ["الكل"] + [cat[0] for cat in fm.get_category_totals()], key="filter_category")
+        with col4:
+            page_size = st.selectbox("📄 عدد الصفوف", [25, 50, 100], index=1, key="page_size")
+
+        filters = dict(
+            trans_type="IN" if filter_type == "وارد" else "OUT" if filter_type == "منصرف" else None,
+            category=filter_category if filter_category != "الكل" else None,
+            search=search_query or None
+        )
+        # Cursor stack for keyset paging; start over whenever the filters change.
+        page_key = (tuple(filters.values()), page_size)
+        if st.session_state.get("page_key") != page_key:
+            st.session_state.page_key = page_key
+            st.session_state.page_cursors = [None]
+
+        # as_frame imports pandas only here, keeping it off the page's cold path
+        page_df, next_cursor = fm.get_transactions_page(st.session_state.page_cursors[-1], page_size, as_frame=True, **filters)
+        total_count = fm.get_summary(**filters)["count"]
+        page_number = len(st.session_state.page_cursors)
+
+        page_df["type"] = page_df["type"].map({"IN": "وارد", "OUT": "منصرف"})
+        page_df["amount"] = major_series(page_df["amount"])
+        page_df["account"] = page_df["account_id"].map(account_options)
+        st.dataframe(page_df[["date", "type", "amount", "account", "category", "description"]], use_container_width=True)
+
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("⬅️ السابق", disabled=page_number == 1, key="page_prev"):
+                st.session_state.page_cursors.pop()
+                st.rerun()
+        with col2:
+            st.caption(f"صفحة {page_number} من {max(1, -(-total_count // page_size))} — {total_count} معاملة")
+        with col3:
+            if st.button("التالي ➡️", disabled=next_cursor is None, key="page_next"):
+                st.session_state.page_cursors.append(next_cursor)
+                st.rerun()
+    else:
+        st.info("ℹ️ لا توجد معاملات مسجلة.")
+
+# Tab 4: Import Bank Statement
+with tab4:
+    st.subheader("📥 استيراد كشف حساب")
+    st.markdown("<p style='color: #6b7280;'>ارفع كشف حساب بصيغة CSV أو OFX وسيتم تجاهل المعاملات المستوردة من قبل.</p>", unsafe_allow_html=True)
+    st.markdown("---")
+
+    if accounts:
+        import_account_id = st.selectbox("🏦 الحساب", options=list(account_options.keys()), format_func=lambda x: account_options[x], key="import_account")
+        statement = st.file_uploader("📄 ملف الكشف", type=["csv", "ofx", "qfx"], key="import_file")
+        if statement is not None and st.button("📥 استيراد", key="import_button"):
+            progress_bar = st.progress(0.0)
+            progress_text = st.empty()
+
+            def show_progress(inserted, skipped):
+                progress_bar.progress(min(1.0, statement.tell() / max(statement.size, 1)))
+                progress_text.caption(f"تمت إضافة {inserted} وتجاهل {skipped} معاملة مكررة...")
+
+            try:
+                inserted, skipped = import_statement(fm, statement, statement.name, import_account_id, progress=show_progress)
+                progress_bar.progress(1.0)
+                st.success(f"✅ تم استيراد {inserted} معاملة (تم تجاهل {skipped} معاملة مكررة).")
+            except (StatementError, ValueError) as e:
+                st.error(f"❌ خطأ: {str(e)}")
+    else:
+        st.warning("⚠️ لا توجد حسابات مضافة. يرجى إضافة حساب أولاً.")
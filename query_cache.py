@@ -0,0 +1,82 @@
+"""In-process cache for FinanceManager read queries.
+
+Entries are tagged with the user's data version (a counter in the
+data_versions table that every FinanceManager write bumps in the same
+transaction). A hit is only served while that version is unchanged.
+SQLite's ``PRAGMA data_version`` on a dedicated watcher connection tells
+us cheaply whether *any* connection, in this process or another, has
+committed since we last looked; only then are per-user versions re-read.
+"""
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = 4096
+
+
+class DataVersions:
+    def __init__(self, watcher):
+        self._watcher = watcher
+        self._lock = threading.Lock()
+        self._seen = None
+        self._versions = {}
+
+    def current(self, conn, user_id):
+        with self._lock:
+            if self._watcher is None:
+                # Closed with its pool: nothing tells us when to forget versions, so always read them.
+                return self._read(conn, user_id)
+            changed = self._watcher.execute('PRAGMA data_version').fetchone()[0]
+            if changed != self._seen:
+                self._seen = changed
+                self._versions.clear()
+            if user_id in self._versions:
+                return self._versions[user_id]
+            seen = self._seen
+        version = self._read(conn, user_id)
+        with self._lock:
+            # A commit noticed by another caller meanwhile may postdate this read: don't cache it past that.
+            if self._seen == seen:
+                self._versions.setdefault(user_id, version)
+        return version
+
+    @staticmethod
+    def _read(conn, user_id):
+        row = conn.execute('SELECT version FROM data_versions WHERE user_id = ?', (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def close(self):
+        with self._lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+
+
+class QueryCache:
+    """Bounded LRU of (version, value) pairs keyed by (user_id, query name, arguments)."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,20 @@
+import streamlit as st
+
+COOKIE_NAME = "floos_session"
+
+
+def read_session_cookie():
+    return st.context.cookies.get(COOKIE_NAME)
+
+
+def write_session_cookie(token, max_age):
+    """Set (or with max_age=0, clear) the session cookie from the browser side; Secure when served over https."""
+    import streamlit.components.v1 as components
+
+    components.html(
+        "<script>"
+        f"window.parent.document.cookie = '{COOKIE_NAME}={token}; path=/; max-age={int(max_age)}; SameSite=Strict'"
+        " + (window.parent.location.protocol === 'https:' ? '; Secure' : '');"
+        "</script>",
+        height=0,
+    )
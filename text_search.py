@@ -0,0 +1,44 @@
+"""Text folding and MATCH-query building for the transactions_fts index.
+
+SQLite's unicode61 tokenizer splits Arabic words on harakat and treats the
+alef/yeh/teh-marbuta variants as different letters, so both the indexed text
+and the user's query are folded the same way before they reach FTS5.
+"""
+
+# (from, to) pairs. The transactions_fts triggers bake this list in, so any
+# change needs a migration that recreates them and rebuilds the index.
+ARABIC_FOLDS = [
+    # harakat (fathatan .. sukun) and tatweel
+    ('\u064b', ''), ('\u064c', ''), ('\u064d', ''), ('\u064e', ''),
+    ('\u064f', ''), ('\u0650', ''), ('\u0651', ''), ('\u0652', ''),
+    ('\u0640', ''),
+    # alef with hamza/madda -> alef, alef maksura -> yeh, teh marbuta -> heh
+    ('\u0623', '\u0627'), ('\u0625', '\u0627'), ('\u0622', '\u0627'),
+    ('\u0649', '\u064a'), ('\u0629', '\u0647'),
+]
+
+
+def fold_text(text):
+    for old, new in ARABIC_FOLDS:
+        text = text.replace(old, new)
+    return text
+
+
+def fold_sql(expr):
+    """SQL expression applying ARABIC_FOLDS to ``expr``, for use inside triggers."""
+    for old, new in ARABIC_FOLDS:
+        expr = f"replace({expr}, '{old}', '{new}')"
+    return expr
+
+
+def _quote(token):
+    return '"' + token.replace('"', '""') + '"'
+
+
+def match_expression(query, user_id):
+    """FTS5 MATCH string: every query word as a prefix, scoped to one user's rows."""
+    tokens = fold_text(query).split()
+    if not tokens:
+        return None
+    terms = ' AND '.join(f'{_quote(token)} *' for token in tokens)
+    return f'user_id : {_quote(str(user_id))} AND {{description category payment_method}} : ({terms})'